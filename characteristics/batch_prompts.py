@@ -0,0 +1,166 @@
+"""Generate encounter prompts in bulk, optionally sending them to the LLM.
+
+    python batch_prompts.py --count 500 --output prompts.jsonl
+    python batch_prompts.py --count 500 --send --backend http --concurrency 16 --rate 20 --output replies.jsonl
+
+Encounters are drawn without repeats from the class x characteristic x
+location space (until it runs out) and combined with the current
+gamestate's notable events. With --send, prompts go to the backend from a
+thread pool, paced by --rate and retried from a shared --retries budget.
+Each result is written as one JSON line as soon as it arrives.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from catalog import SCRIPT_DIR, get_catalog
+from gamestate_store import GameStateStore
+from prompt_engine import build_encounter_prompt
+
+# The backends live with the game in src/
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "src"))
+from llm_backends import DEFAULT_MODEL, create_backend
+
+
+def sample_encounters(catalog, count, rng):
+    """count encounters with no repeats while the combination space allows."""
+    classes = catalog.tables['classes']
+    characteristics = catalog.tables['characteristics']
+    locations = catalog.tables['locations']
+    total = len(classes) * len(characteristics) * len(locations)
+    indices = rng.sample(range(total), min(count, total))
+    # Past the size of the space, repeats are unavoidable
+    indices += [rng.randrange(total) for _ in range(count - len(indices))]
+    for index in indices:
+        index, location = divmod(index, len(locations))
+        class_index, characteristic = divmod(index, len(characteristics))
+        yield {
+            "class": classes[class_index],
+            "characteristic": characteristics[characteristic],
+            "location": locations[location],
+        }
+
+
+class RateLimiter:
+    """Lets at most rate calls through per second, spaced evenly, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+
+class RetryBudget:
+    def __init__(self, retries):
+        self.remaining = retries
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            self.used += 1
+            return True
+
+
+def send_prompt(backend, record, limiter, budget, backoff=0.5):
+    attempt = 0
+    while True:
+        limiter.wait()
+        started = time.perf_counter()
+        try:
+            text, tokens = backend.generate(record["prompt"])
+            return dict(record, reply=text, tokens=tokens, attempts=attempt + 1,
+                        latency_ms=round((time.perf_counter() - started) * 1000, 1))
+        except Exception as e:
+            if not budget.take():
+                return dict(record, error=str(e), attempts=attempt + 1)
+            time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.0))
+            attempt += 1
+
+
+def make_backend(args):
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if args.backend == "gemini" and not api_key:
+        import getpass
+        api_key = getpass.getpass("Gemini API Key: ")
+    return create_backend(args.backend, api_key=api_key, url=args.backend_url, model_name=args.model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch encounter prompt generator")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="JSON-lines file to write, stdout if omitted")
+    parser.add_argument("--send", action="store_true", help="also send every prompt to the LLM backend")
+    parser.add_argument("--backend", choices=["gemini", "mock", "http"], default="gemini")
+    parser.add_argument("--backend-url")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0, help="max requests per second, 0 for unlimited")
+    parser.add_argument("--retries", type=int, default=20, help="retries shared by the whole batch")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    notable_events = GameStateStore().notable_events
+    records = []
+    for i, character in enumerate(sample_encounters(get_catalog(), args.count, rng)):
+        records.append({
+            "index": i,
+            "class": character['class']['name'],
+            "characteristic": character['characteristic']['name'],
+            "location": character['location']['name'],
+            "prompt": build_encounter_prompt(character, notable_events),
+        })
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    started = time.perf_counter()
+    failed = 0
+    tokens = 0
+    budget = RetryBudget(args.retries)
+    try:
+        if not args.send:
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+        else:
+            backend = make_backend(args)
+            limiter = RateLimiter(args.rate)
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                futures = [pool.submit(send_prompt, backend, r, limiter, budget) for r in records]
+                for future in as_completed(futures):
+                    result = future.result()
+                    if "error" in result:
+                        failed += 1
+                    tokens += result.get("tokens", 0)
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    rate = len(records) / elapsed if elapsed > 0 else float("inf")
+    summary = f"{len(records)} prompts in {elapsed:.2f}s ({rate:.1f} prompts/s)"
+    if args.send:
+        summary += f", {failed} failed, {budget.used} retries, {tokens} tokens"
+    print(summary, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
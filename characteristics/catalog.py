@@ -0,0 +1,141 @@
+import json
+import os
+import pickle
+import random
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CHARACTER_JSON_PATH = os.path.join(SCRIPT_DIR, 'unrestricted_character_data.json')
+LOCATION_JSON_PATH = os.path.join(SCRIPT_DIR, 'indexed_locations.json')
+LOCATION_CSV_PATH = os.path.join(SCRIPT_DIR, 'city_locations.csv')
+CACHE_PATH = os.path.join(SCRIPT_DIR, '.catalog_cache.pickle')
+CACHE_VERSION = 1
+
+
+class Catalog:
+    """Character classes, characteristics and locations, loaded once.
+
+    Each table is kept as a list (for O(1) random draws) plus id -> entry
+    and lowercased name -> id indexes. The parsed tables are also pickled
+    to CACHE_PATH along with the source files' mtimes and sizes, so later
+    processes skip the JSON parsing while the sources are unchanged.
+    Nothing touches the disk after construction unless refresh() is called.
+    """
+
+    def __init__(self, character_path=CHARACTER_JSON_PATH, location_path=LOCATION_JSON_PATH,
+                 cache_path=CACHE_PATH):
+        self.character_path = character_path
+        self.location_path = location_path
+        self.cache_path = cache_path
+        self.sources = None
+        self.load()
+
+    def _source_stamps(self):
+        stamps = {}
+        for path in (self.character_path, self.location_path):
+            stat = os.stat(path)
+            stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def _read_cache(self, stamps):
+        if self.cache_path is None:
+            return None
+        try:
+            with open(self.cache_path, 'rb') as file:
+                cached = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if cached.get("version") != CACHE_VERSION or cached.get("sources") != stamps:
+            return None
+        return cached["tables"]
+
+    def _write_cache(self, stamps, tables):
+        if self.cache_path is None:
+            return
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as file:
+                pickle.dump({"version": CACHE_VERSION, "sources": stamps, "tables": tables}, file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Could not write catalog cache: {e}")
+
+    def _parse_sources(self):
+        with open(self.character_path, 'r') as file:
+            character_data = json.load(file)
+        with open(self.location_path, 'r') as file:
+            location_data = json.load(file)
+        return {
+            "classes": character_data['classes'],
+            "characteristics": character_data['characteristics'],
+            "locations": location_data['locations'],
+        }
+
+    def _ensure_sources(self):
+        if not os.path.exists(self.character_path):
+            print(f"Error: Character data file not found at {self.character_path}")
+            print("Current directory:", os.getcwd())
+            print("Files in directory:", os.listdir(SCRIPT_DIR))
+            sys.exit(1)
+
+        if not os.path.exists(self.location_path):
+            print(f"Error: Location data file not found at {self.location_path}")
+            print("Current directory:", os.getcwd())
+            print("Files in directory:", os.listdir(SCRIPT_DIR))
+
+            # Try to find the locations.csv file and create the JSON
+            if os.path.exists(LOCATION_CSV_PATH):
+                from combined_random_generator import create_locations_json
+                print(f"Found city_locations.csv, creating JSON file...")
+                create_locations_json(LOCATION_CSV_PATH, self.location_path)
+            else:
+                print(f"Could not find city_locations.csv either.")
+                sys.exit(1)
+
+    def load(self):
+        self._ensure_sources()
+        stamps = self._source_stamps()
+        tables = self._read_cache(stamps)
+        if tables is None:
+            tables = self._parse_sources()
+            self._write_cache(stamps, tables)
+        self.sources = stamps
+        self.tables = tables
+        self.by_id = {name: {entry['id']: entry for entry in entries} for name, entries in tables.items()}
+        self.name_to_id = {name: {entry['name'].lower(): entry['id'] for entry in entries}
+                           for name, entries in tables.items()}
+
+    def refresh(self):
+        """Reload if a source file changed since it was loaded. Returns True if it did."""
+        if self._source_stamps() == self.sources:
+            return False
+        self.load()
+        return True
+
+    def get(self, table, entry_id):
+        return self.by_id[table][entry_id]
+
+    def id_for(self, table, name):
+        return self.name_to_id[table].get(name.lower())
+
+    def random_entry(self, table, rng=random):
+        return rng.choice(self.tables[table])
+
+    def random_encounter(self, rng=random):
+        return {
+            "class": self.random_entry('classes', rng),
+            "characteristic": self.random_entry('characteristics', rng),
+            "location": self.random_entry('locations', rng),
+        }
+
+
+_catalog = None
+
+
+def get_catalog():
+    """The process-wide catalog, loaded on first use."""
+    global _catalog
+    if _catalog is None:
+        _catalog = Catalog()
+    return _catalog
@@ -0,0 +1,124 @@
+import json
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_PATH = os.path.join(SCRIPT_DIR, "gamestate.json")
+JOURNAL_PATH = os.path.join(SCRIPT_DIR, "gamestate.journal.jsonl")
+
+EMPTY_GAMESTATE = {
+    "encounter_count": 0,
+    "current_location": None,
+    "traits": {},
+    "history": [],
+    "summary": {"notable_events": []},
+}
+
+
+def write_json_atomic(path, data):
+    """Write to a temp file, fsync, then rename over path: readers see old or new, never half."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class GameStateStore:
+    """gamestate.json as a snapshot plus an append-only encounter journal.
+
+    Each new encounter is one JSON line appended (and fsynced) to the
+    journal, so recording an encounter doesn't rewrite the history. Every
+    compact_every encounters the journal is folded into a new snapshot,
+    written atomically. Journal lines carry their encounter number and
+    anything the snapshot already covers is skipped on load, so a crash at
+    any point loses at most the line being written. A torn last line is
+    skipped on load and only cut off by the next append, so a store that
+    just reads never changes the journal under a writer mid-append.
+    """
+
+    def __init__(self, snapshot_path=SNAPSHOT_PATH, journal_path=JOURNAL_PATH, compact_every=50):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self.journaled = 0
+        # Where the complete journal lines end, if a torn line follows them
+        self.torn_at = None
+        self.state = self._load()
+
+    def _load(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                state = json.load(f)
+        else:
+            state = json.loads(json.dumps(EMPTY_GAMESTATE))
+        state.setdefault("history", [])
+        state.setdefault("summary", {}).setdefault("notable_events", [])
+
+        if not os.path.exists(self.journal_path):
+            return state
+        good_bytes = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-append
+                    break
+                good_bytes += len(line)
+                self.journaled += 1
+                if entry["encounter"]["encounter_number"] > state["encounter_count"]:
+                    self._apply(state, entry)
+        if good_bytes < os.path.getsize(self.journal_path):
+            print(f"Ignoring incomplete journal entry in {self.journal_path}")
+            self.torn_at = good_bytes
+        return state
+
+    def _apply(self, state, entry):
+        encounter = entry["encounter"]
+        state["history"].append(encounter)
+        state["encounter_count"] = encounter["encounter_number"]
+        if encounter.get("location"):
+            state["current_location"] = encounter["location"]
+        state["summary"]["notable_events"].extend(entry.get("notable_events", []))
+
+    @property
+    def encounter_count(self):
+        return self.state["encounter_count"]
+
+    @property
+    def notable_events(self):
+        return self.state["summary"]["notable_events"]
+
+    @property
+    def history(self):
+        return self.state["history"]
+
+    def append_encounter(self, encounter, notable_events=()):
+        """Record one encounter; its encounter_number is assigned here."""
+        encounter = dict(encounter, encounter_number=self.encounter_count + 1)
+        entry = {"encounter": encounter, "notable_events": list(notable_events)}
+        if self.torn_at is not None:
+            # Writing after the torn line would glue the new entry onto it
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(self.torn_at)
+            self.torn_at = None
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(self.state, entry)
+        self.journaled += 1
+        if self.journaled >= self.compact_every:
+            self.compact()
+        return encounter
+
+    def compact(self):
+        """Fold the journal into the snapshot and start a new journal."""
+        write_json_atomic(self.snapshot_path, self.state)
+        # If we crash before this, the old entries are skipped on the next load
+        with open(self.journal_path, "w") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.journaled = 0
+        self.torn_at = None
@@ -1,7 +1,7 @@
 import json
-import random
-import os
-import sys
+
+from catalog import get_catalog
+from gamestate_store import GameStateStore
 
 def create_locations_json(csv_path, json_path):
     """
@@ -56,74 +56,17 @@ def create_locations_json(csv_path, json_path):
 def generate_random_character_and_location():
     """
     Randomly selects one class, one characteristic, and one location from the JSON files.
+
+    The files are only read the first time; after that this is pure in-memory draws.
     
     Returns:
         dict: A dictionary containing the selected class, characteristic, and location
     """
-    # Get the directory of the current script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Paths to the JSON files
-    character_json_path = os.path.join(script_dir, 'unrestricted_character_data.json')
-    location_json_path = os.path.join(script_dir, 'indexed_locations.json')
-    
-    # Check if files exist
-    if not os.path.exists(character_json_path):
-        print(f"Error: Character data file not found at {character_json_path}")
-        print("Current directory:", os.getcwd())
-        print("Files in directory:", os.listdir(script_dir))
-        sys.exit(1)
-        
-    if not os.path.exists(location_json_path):
-        print(f"Error: Location data file not found at {location_json_path}")
-        print("Current directory:", os.getcwd())
-        print("Files in directory:", os.listdir(script_dir))
-        
-        # Try to find the locations.csv file and create the JSON
-        csv_path = os.path.join(script_dir, 'city_locations.csv')
-        if os.path.exists(csv_path):
-            print(f"Found city_locations.csv, creating JSON file...")
-            create_locations_json(csv_path, location_json_path)
-        else:
-            print(f"Could not find city_locations.csv either.")
-            sys.exit(1)
-    
-    # Read the character JSON file
-    with open(character_json_path, 'r') as file:
-        character_data = json.load(file)
-    
-    # Read the location JSON file
-    with open(location_json_path, 'r') as file:
-        location_data = json.load(file)
-    
-    # Randomly select one class
-    random_class = random.choice(character_data['classes'])
-    
-    # Randomly select one characteristic
-    random_characteristic = random.choice(character_data['characteristics'])
-    
-    # Randomly select one location
-    random_location = random.choice(location_data['locations'])
-    
-    # Create the result
-    result = {
-        "class": random_class,
-        "characteristic": random_characteristic,
-        "location": random_location
-    }
-    
-    return result
+    return get_catalog().random_encounter()
 
 
-def prompt_function():
-
-    with open("gamestate.json", "r") as f:
-        gamestate = json.load(f)
-
-    notable_events = gamestate["summary"]["notable_events"]
-    character = generate_random_character_and_location()
-
-    prompt = f"""
+def build_encounter_prompt(character, notable_events):
+    return f"""
 you are a narrative storyteller in a novel-type videogame.
 you take the role of the npc in each encounter and start a dialogue.
 your dialogue is based on:
@@ -137,7 +80,17 @@ then give player 4 options to continue the encounter.
 the options from player can be positive or negative reactions,
 or actions that end the encounter(kill, walk away.. etc..)
 """
+
+
+def prompt_function():
+
+    # Snapshot plus any encounters journaled since the last compaction
+    notable_events = GameStateStore().notable_events
+    character = generate_random_character_and_location()
+
+    prompt = build_encounter_prompt(character, notable_events)
     print (prompt)
     return prompt
 
-prompt_function()
+if __name__ == "__main__":
+    prompt_function()
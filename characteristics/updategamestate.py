@@ -1,13 +1,56 @@
+"""Record one encounter in the gamestate journal.
+
+    python updategamestate.py --location "Underground Gambling Den" --npc-class "Boastful Sellsword" \
+        --trait loud --trait cocky --player-choice "Confronted him about the priest" \
+        --result "He challenged you to a duel at dawn"
+    echo '{"location": ..., "npc_class": ...}' | python updategamestate.py --stdin
+
+Notable events are only recorded when given with --notable-event.
+"""
+import argparse
 import json
+import sys
+
+from gamestate_store import GameStateStore
+
+
+def read_encounter(args):
+    if args.stdin:
+        entry = json.load(sys.stdin)
+        # Either a bare encounter or {"encounter": ..., "notable_events": [...]}
+        if "encounter" in entry:
+            return entry["encounter"], entry.get("notable_events", [])
+        return entry, []
+    encounter = {
+        "location": args.location,
+        "npc_class": args.npc_class,
+        "npc_traits": args.trait,
+        "player_choice": args.player_choice,
+        "result": args.result,
+    }
+    return {key: value for key, value in encounter.items() if value is not None}, []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append an encounter to the gamestate journal")
+    parser.add_argument("--stdin", action="store_true", help="read the encounter as JSON from stdin")
+    parser.add_argument("--location")
+    parser.add_argument("--npc-class")
+    parser.add_argument("--trait", action="append", default=[])
+    parser.add_argument("--player-choice")
+    parser.add_argument("--result")
+    parser.add_argument("--notable-event", action="append", default=[])
+    args = parser.parse_args()
+
+    encounter, notable_events = read_encounter(args)
+    if not args.stdin and not (args.location and args.npc_class):
+        parser.error("--location and --npc-class are required unless --stdin is given")
+
+    store = GameStateStore()
+    # Appends one journal line instead of rewriting gamestate.json
+    recorded = store.append_encounter(encounter, notable_events=notable_events + args.notable_event)
+    print(f"Recorded encounter {recorded['encounter_number']}")
+
 
-with open("gamestate.json", "r") as f:
-    gamestate = json.load(f)
-
-new_encounter = {
-    "encounter_number": gamestate["encounter_count"] + 1,
-    "location": "Underground Gambling Den",
-    "npc_class": "Boastful Sellsword",
-    "npc_traits": ["loud", "cocky"],
-    "player_choice": "Confronted him about the priest",
-    "result": "He challenged you to a duel at dawn"
-}
+if __name__ == "__main__":
+    main()
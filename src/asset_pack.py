@@ -0,0 +1,157 @@
+"""Prebaked per-resolution asset packs.
+
+Run this file to build one pack per supported resolution:
+
+    python asset_pack.py
+
+Each pack holds the backgrounds scaled to the screen, the character
+expressions scaled to the height game_loop draws them at, and dialogue_bg.png
+at the option box size, all as raw pixels. The game memory-maps the pack and
+wraps the pixels with pygame.image.frombuffer, so no PNG is decoded. When no
+pack exists for the current resolution the PNGs are loaded as before.
+
+File layout: MAGIC, a little-endian uint32 header length, a JSON index
+mapping "<folder>/<file>" to offset, size and pixel format, then the pixel
+blobs. Offsets are relative to the end of the header.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+
+from config import SUPPORTED_RESOLUTIONS
+from log import log
+
+MAGIC = b"VNPACK1\0"
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+PACK_DIR = os.path.join(ASSETS_DIR, "packs")
+# Size of a dialogue option box, see dialogue.option_rects
+OPTION_BOX_SIZE = (500, 210)
+
+
+def pack_key(path):
+    """Assets are looked up by their last two path components, e.g. 'characters/john_happy.png'."""
+    parts = os.path.normpath(path).split(os.sep)
+    return "/".join(parts[-2:])
+
+
+def pack_path(width, height):
+    return os.path.join(PACK_DIR, f"{width}x{height}.pack")
+
+
+def character_size(sprite_size, screen_height):
+    # Same integer math as draw_scene so the packed size matches exactly
+    char_width, char_height = sprite_size
+    new_char_height = screen_height - 50
+    return char_width * new_char_height // char_height, new_char_height
+
+
+class AssetPack:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an asset pack")
+        header_start = len(MAGIC) + 4
+        (header_length,) = struct.unpack("<I", self.data[len(MAGIC):header_start])
+        self.index = json.loads(self.data[header_start:header_start + header_length].decode("utf-8"))
+        self.data_start = header_start + header_length
+        self.view = memoryview(self.data)
+
+    def __contains__(self, path):
+        return pack_key(path) in self.index
+
+    def surface(self, path):
+        entry = self.index[pack_key(path)]
+        start = self.data_start + entry["offset"]
+        # The surface shares memory with the map, it must stay open while in use
+        return pygame.image.frombuffer(self.view[start:start + entry["length"]], tuple(entry["size"]), entry["format"])
+
+    def close(self):
+        try:
+            if getattr(self, "view", None) is not None:
+                self.view.release()
+                self.view = None
+            self.data.close()
+        except BufferError:
+            # Some surface still points into the map, let it go with the last reference
+            pass
+        finally:
+            # The map keeps its own handle, the file itself can always be closed
+            self.file.close()
+
+
+def load_asset_pack(width, height):
+    """Open the pack for this resolution, or None to fall back to PNGs."""
+    path = pack_path(width, height)
+    if not os.path.exists(path):
+        return None
+    try:
+        return AssetPack(path)
+    except (OSError, ValueError) as e:
+        log.warning("Ignoring asset pack %s: %s", path, e)
+        return None
+
+
+def build_asset_pack(width, height):
+    entries = []
+
+    backgrounds_dir = os.path.join(ASSETS_DIR, "backgrounds")
+    for name in sorted(os.listdir(backgrounds_dir)):
+        if not name.endswith(".png"):
+            continue
+        image = pygame.image.load(os.path.join(backgrounds_dir, name))
+        if name == "dialogue_bg.png":
+            scaled = pygame.transform.scale(image, OPTION_BOX_SIZE)
+            entries.append((f"backgrounds/{name}", scaled, "RGBA"))
+        else:
+            scaled = pygame.transform.scale(image, (width, height))
+            entries.append((f"backgrounds/{name}", scaled, "RGB"))
+
+    characters_dir = os.path.join(ASSETS_DIR, "characters")
+    for name in sorted(os.listdir(characters_dir)):
+        if not name.endswith(".png"):
+            continue
+        image = pygame.image.load(os.path.join(characters_dir, name))
+        if image.get_bitsize() not in (24, 32):
+            image = image.convert(32, pygame.SRCALPHA)
+        scaled = pygame.transform.smoothscale(image, character_size(image.get_size(), height))
+        entries.append((f"characters/{name}", scaled, "RGBA"))
+
+    index = {}
+    blobs = []
+    offset = 0
+    for key, surface, pixel_format in entries:
+        blob = pygame.image.tobytes(surface, pixel_format)
+        index[key] = {"offset": offset, "length": len(blob), "size": list(surface.get_size()), "format": pixel_format}
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = json.dumps(index).encode("utf-8")
+
+    os.makedirs(PACK_DIR, exist_ok=True)
+    path = pack_path(width, height)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    pygame.init()
+    resolutions = SUPPORTED_RESOLUTIONS
+    if len(sys.argv) > 1:
+        resolutions = [tuple(int(v) for v in arg.split("x")) for arg in sys.argv[1:]]
+    for width, height in resolutions:
+        path = build_asset_pack(width, height)
+        print(f"Built {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
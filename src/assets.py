@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pygame
+
+from metrics import metrics
+
+
+class AssetManager:
+    """Owns every image the game loads.
+
+    Each file is decoded once and shared by everyone who asks for it. Once a
+    display exists, images are also converted to the display pixel format
+    so blits don't have to convert them again. Decoding is thread-safe,
+    so preload() can warm the cache in the background; the display
+    conversion itself happens on the caller's thread.
+
+    When an asset pack is in use, images it contains are served from the
+    pack's raw, pre-scaled pixels instead of decoding the PNG.
+    """
+
+    def __init__(self):
+        self.decoded = {}
+        self.converted = {}
+        self.lock = threading.Lock()
+        self.path_locks = {}
+        self.preloader = None
+        self.pack = None
+
+    def _path_lock(self, path):
+        with self.lock:
+            lock = self.path_locks.get(path)
+            if lock is None:
+                lock = self.path_locks[path] = threading.Lock()
+            return lock
+
+    def decode(self, path):
+        surface = self.decoded.get(path)
+        if surface is not None:
+            return surface
+        # Only one thread decodes a given file, the others wait for it
+        with self._path_lock(path):
+            surface = self.decoded.get(path)
+            if surface is None:
+                started = time.perf_counter()
+                surface = pygame.image.load(path)
+                metrics.observe("asset_load_ms", (time.perf_counter() - started) * 1000, source="png")
+                self.decoded[path] = surface
+        return surface
+
+    def use_pack(self, pack):
+        """Serve images from pack (or from PNGs again when pack is None)."""
+        old_pack = self.pack
+        if old_pack is pack:
+            return
+        self.pack = pack
+        self.converted.clear()
+        if old_pack is not None:
+            old_pack.close()
+
+    def image(self, path, alpha=False):
+        key = (path, alpha)
+        surface = self.converted.get(key)
+        if surface is not None:
+            return surface
+        if self.pack is not None and path in self.pack:
+            with metrics.timer("asset_load_ms", source="pack"):
+                surface = self.pack.surface(path)
+        else:
+            surface = self.decode(path)
+        if pygame.display.get_surface() is None:
+            return surface
+        surface = surface.convert_alpha() if alpha else surface.convert()
+        self.converted[key] = surface
+        return surface
+
+    def convert_all(self):
+        """Convert everything already requested to the current display format."""
+        keys = list(self.converted)
+        self.converted.clear()
+        for path, alpha in keys:
+            self.image(path, alpha)
+
+    def preload(self, paths):
+        """Decode paths on a background thread, skipping any that fail."""
+        def run():
+            for path in paths:
+                if self.pack is not None and path in self.pack:
+                    continue
+                try:
+                    self.decode(path)
+                except (pygame.error, FileNotFoundError):
+                    continue
+
+        if self.preloader is not None and self.preloader.is_alive():
+            return
+        self.preloader = threading.Thread(target=run, name="asset-preloader", daemon=True)
+        self.preloader.start()
+
+
+asset_manager = AssetManager()
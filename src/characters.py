@@ -2,6 +2,8 @@ import pygame
 import os
 import sys  # Import the sys module
 from dialogue import DialogueCharacteristic
+from assets import asset_manager
+from traits import TraitEngine, option_mask
 
 TRAIT_REACTIONS = {
     "shy": {
@@ -35,6 +37,9 @@ TRAIT_REACTIONS = {
     # Add more traits as needed...
 }
 
+# Compiled once; Characters keep their own trait masks from it
+trait_engine = TraitEngine(TRAIT_REACTIONS)
+
 TRAIT_PROMPTS = {
     "warrior": "You are a warrior, tough, confident, and focused on combat. You react positively to praise and encouragement, but negatively to weakness or criticism.",
     "shy": "You are shy, reserved, and easily embarrassed. You react positively to gentle compliments and kindness, but negatively to teasing or bold advances.",
@@ -51,44 +56,63 @@ def get_asset_path(relative_path):
     base_path = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
     return os.path.join(base_path, relative_path)
 
+CHARACTER_DIR = os.path.join("..", "assets", "characters")
+BACKGROUND_DIR = os.path.join("..", "assets", "backgrounds")
+EXPRESSIONS = ("neutral", "happy", "unhappy")
+
+def character_sprite_path(character_name, expression):
+    return get_asset_path(os.path.join(CHARACTER_DIR, f"{character_name}_{expression}.png"))
+
+def background_path(background_name):
+    return get_asset_path(os.path.join(BACKGROUND_DIR, f"{background_name}.png"))
+
+def preload_paths():
+    """Every sprite and background the predefined characters can use"""
+    paths = []
+    for char_info in PREDEFINED_CHARACTERS:
+        paths.extend(character_sprite_path(char_info["character_name"], e) for e in EXPRESSIONS)
+    for char_info in PREDEFINED_CHARACTERS:
+        for bg_name in char_info["backgrounds"]:
+            path = background_path(bg_name)
+            if path not in paths:
+                paths.append(path)
+    return paths
+
 class Character:
     def __init__(self, name, character_name, char_type, personality_traits):
-        self.base_dir = os.path.join("..", "assets", "characters")
+        self.base_dir = CHARACTER_DIR
         self.sprites = {
             "neutral": self.load_image(f"{character_name}_neutral"),
             "happy": self.load_image(f"{character_name}_happy"),
             "unhappy": self.load_image(f"{character_name}_unhappy"),
         }
         self.current_sprite = self.sprites["neutral"]
+        self.expression = "neutral"
+        self.character_name = character_name
         self.name = name
         self.char_type = char_type
         self.personality_traits = personality_traits
+        self.trait_masks = trait_engine.compile_traits(personality_traits)
 
     def load_image(self, character_name):
         image_path = get_asset_path(os.path.join(self.base_dir, f"{character_name}.png"))
-        return pygame.image.load(image_path)
+        # Shared with every other Character using the same sprite
+        return asset_manager.image(image_path, alpha=True)
 
     def set_sprite_by_reaction(self, reaction):
         if reaction > 0:
-            self.current_sprite = self.sprites["happy"]
+            self.expression = "happy"
         elif reaction < 0:
-            self.current_sprite = self.sprites["unhappy"]
+            self.expression = "unhappy"
         else:
-            self.current_sprite = self.sprites["neutral"]
+            self.expression = "neutral"
+        self.current_sprite = self.sprites[self.expression]
 
     def react_to_dialogue(self, dialogue_option):
-        reaction = 0
-        for trait in self.personality_traits:
-            trait_reactions = TRAIT_REACTIONS.get(trait, {})
-            positives = trait_reactions.get("positive", set())
-            negatives = trait_reactions.get("negative", set())
-            # Check for positive matches
-            if any(char in positives for char in dialogue_option.characteristics):
-                reaction += 1
-            # Check for negative matches
-            if any(char in negatives for char in dialogue_option.characteristics):
-                reaction -= 1
-        return reaction
+        # +1 for every trait that likes any of the option's characteristics,
+        # -1 for every trait that dislikes any of them
+        return trait_engine.score(self.trait_masks, option_mask(dialogue_option))
+
     def get_response_by_reaction(self, reaction):
         if reaction > 0:
             return "Thanks!"
@@ -99,14 +123,14 @@ class Character:
 
 class Background:
     def __init__(self, background_name):
-        self.base_dir = os.path.join("..", "assets", "backgrounds")
+        self.base_dir = BACKGROUND_DIR
         self.name = background_name
         self.image = self.load_image(background_name)
 
     def load_image(self, background_name):
         image_path = get_asset_path(os.path.join(self.base_dir, f"{background_name}.png"))
         try:
-            return pygame.image.load(image_path)
+            return asset_manager.image(image_path)
         except Exception:
             # Return a blank surface if not found
             surf = pygame.Surface((800, 300))  # Adjust size as needed
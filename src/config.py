@@ -1 +1,33 @@
 FONT_SIZE = 36
+
+# Frame pacing for every menu and game loop
+FPS_CAP = 60
+# Block on the event queue instead of redrawing when nothing is animating
+IDLE_MODE = True
+# Wake up at least this often in idle mode (ms)
+IDLE_WAKEUP_MS = 500
+
+# Resolutions offered in the options menu, asset packs are built for each
+SUPPORTED_RESOLUTIONS = [(800, 600), (1024, 768), (1920, 1080)]
+
+# Dialogue options drawn per turn skip the last this many shown in the encounter
+RECENT_OPTIONS = 16
+# Always offer at least one option the character likes and one they dislike
+MIX_OPTION_REACTIONS = False
+
+# LLM calls: a turn falls back to the character's canned reaction after this long
+LLM_DEADLINE_S = 8.0
+LLM_MAX_RETRIES = 2
+# Consecutive failed calls (after retries) before skipping the LLM for LLM_BREAKER_COOLDOWN_S
+LLM_BREAKER_THRESHOLD = 3
+LLM_BREAKER_COOLDOWN_S = 30.0
+# Send a duplicate request when the first is slower than the recent p95
+LLM_HEDGE = False
+
+# NPC reply models, fastest first. Ordinary turns use the first tier; first
+# lines of an encounter, long prompts and replies that fail the output check
+# go to the later ones
+LLM_MODEL_TIERS = [("fast", "gemma-3-4b-it"), ("full", "gemma-3-27b-it")]
+LLM_ROUTE_LONG_PROMPT_CHARS = 1500
+LLM_ROUTE_FIRST_TURN = True
+LLM_MAX_REPLY_CHARS = 300
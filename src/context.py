@@ -0,0 +1,123 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from log import log
+
+# Shared by every conversation, summaries are small and rare
+summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+
+
+def format_turns(turns):
+    lines = []
+    for entry in turns:
+        # The NPC's opening line has no player message before it
+        if entry['player']:
+            lines.append(f"Player: {entry['player']}")
+        lines.append(f"NPC: {entry['npc']}")
+    return " ".join(lines)
+
+
+def extractive_summary(previous_summary, turns, max_chars=400):
+    """Local fallback: keep the most recent text that fits, no model call."""
+    text = " ".join(part for part in (previous_summary, format_turns(turns)) if part)
+    if len(text) <= max_chars:
+        return text
+    return "..." + text[-(max_chars - 3):]
+
+
+class ConversationContext:
+    """Conversation history that keeps the prompt within a character budget.
+
+    The last keep_turns turns go into the prompt verbatim. Older turns are
+    folded into a running summary by summarize(previous_summary, turns) on a
+    background thread. The new summary is only swapped in on the next
+    append(), so the prompt text stays the same for the whole turn (which
+    keeps speculative prefetches valid). Until then, older turns stay
+    verbatim, trimmed oldest-first to max_chars.
+
+    max_turns is the most turns the conversation can have, if it is capped:
+    a fold only reaches a prompt two appends later, so folds that no later
+    prompt could use are not started. close() drops a pending summary once
+    the conversation is replaced.
+    """
+
+    def __init__(self, summarize=None, keep_turns=4, max_chars=1500, summary_chars=400, max_turns=None):
+        self.summarize = summarize or extractive_summary
+        self.keep_turns = keep_turns
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.summary_chars = summary_chars
+        self.turns = []
+        self.summary = ""
+        self.summarized = 0
+        self.ready = None
+        self.summarizing = False
+        self.pending = None
+        self.closed = False
+        self.lock = threading.Lock()
+        self.prompt_lengths = []
+
+    def __len__(self):
+        return len(self.turns)
+
+    def __iter__(self):
+        return iter(self.turns)
+
+    def append(self, player, npc):
+        with self.lock:
+            if self.ready is not None:
+                self.summary, self.summarized = self.ready
+                self.ready = None
+        self.turns.append({"player": player, "npc": npc})
+        self._schedule_summary()
+
+    def _schedule_summary(self):
+        fold_until = len(self.turns) - self.keep_turns
+        if fold_until <= self.summarized or self.summarizing or self.closed:
+            return
+        # Swapped in on the next append, so only the prompt after that one would see it
+        if self.max_turns is not None and len(self.turns) + 2 > self.max_turns:
+            return
+        self.summarizing = True
+        previous, turns = self.summary, self.turns[self.summarized:fold_until]
+        future = self.pending = summary_executor.submit(self._run_summary, previous, turns)
+        future.add_done_callback(lambda f: self._summary_done(f, fold_until, previous, turns))
+
+    def _run_summary(self, previous, turns):
+        if self.closed:
+            return None
+        return self.summarize(previous, turns)
+
+    def _summary_done(self, future, fold_until, previous, turns):
+        if self.closed:
+            return
+        try:
+            summary = future.result().strip()
+        except Exception as e:
+            log.warning("Summarization failed, using local summary: %s", e)
+            summary = extractive_summary(previous, turns, self.summary_chars)
+        with self.lock:
+            self.ready = (summary[:self.summary_chars], fold_until)
+            self.summarizing = False
+
+    def close(self):
+        """The conversation is over: drop a summary that hasn't run yet, ignore one that is running."""
+        self.closed = True
+        if self.pending is not None:
+            self.pending.cancel()
+
+    def history_text(self):
+        verbatim = self.turns[self.summarized:]
+        text = format_turns(verbatim)
+        # Drop the oldest verbatim turns until we are back under budget
+        while len(text) > self.max_chars and len(verbatim) > 1:
+            verbatim = verbatim[1:]
+            text = format_turns(verbatim)
+        if self.summary:
+            text = f"Summary of earlier conversation: {self.summary} Recent: {text}"
+        return text
+
+    def record_prompt(self, prompt):
+        self.prompt_lengths.append(len(prompt))
+        log.debug("Prompt length: %d chars (turn %d, %d turns verbatim)",
+                  len(prompt), len(self.turns) + 1, len(self.turns) - self.summarized)
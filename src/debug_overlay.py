@@ -0,0 +1,84 @@
+import pygame
+
+from metrics import metrics
+
+# Toggles the overlay in every loop
+DEBUG_OVERLAY_KEY = pygame.K_F3
+
+
+class DebugOverlay:
+    """Profiler panel in the top-left corner, toggled with F3.
+
+    The text is rebuilt from the metrics at most every refresh_ms, so
+    showing it costs one blit per frame. state() changes only when the
+    text does, which lets the dirty-rect scene skip unchanged frames.
+    """
+
+    def __init__(self, font_size=20, refresh_ms=250):
+        self.font_size = font_size
+        self.refresh_ms = refresh_ms
+        self.visible = False
+        self.font = None
+        self.surface = None
+        self.lines = ()
+        self.built_at = None
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.built_at = None
+
+    def build_lines(self):
+        lines = []
+        with metrics.lock:
+            histograms = sorted(metrics.histograms.items())
+        for (name, labels), histogram in histograms:
+            if not histogram.count:
+                continue
+            label = ",".join(str(v) for _, v in labels)
+            summary = histogram.summary()
+            unit = "" if name.endswith("_chars") else "ms"
+            lines.append(f"{name}{'[' + label + ']' if label else ''}: "
+                         f"p50 {summary['p50']:.1f}{unit} p95 {summary['p95']:.1f}{unit} n={summary['count']}")
+        for name, rate in sorted(metrics.hit_rates().items()):
+            lines.append(f"{name} hit rate: {'-' if rate is None else f'{rate:.0%}'}")
+        return tuple(lines)
+
+    def _refresh(self):
+        now = pygame.time.get_ticks()
+        if self.built_at is not None and now - self.built_at < self.refresh_ms:
+            return
+        self.built_at = now
+        lines = self.build_lines()
+        if lines == self.lines and self.surface is not None:
+            return
+        self.lines = lines
+        if self.font is None:
+            self.font = pygame.font.SysFont("monospace", self.font_size)
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines] or \
+                   [self.font.render("no metrics yet", True, (255, 255, 255))]
+        width = max(s.get_width() for s in rendered) + 12
+        height = sum(s.get_height() for s in rendered) + 12
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 180))
+        y = 6
+        for line_surface in rendered:
+            self.surface.blit(line_surface, (6, y))
+            y += line_surface.get_height()
+
+    def state(self):
+        if not self.visible:
+            return None
+        self._refresh()
+        return self.lines
+
+    def rect(self):
+        return self.surface.get_rect(topleft=(8, 8))
+
+    def draw(self, surface):
+        if not self.visible:
+            return
+        self._refresh()
+        surface.blit(self.surface, (8, 8))
+
+
+debug_overlay = DebugOverlay()
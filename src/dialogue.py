@@ -1,8 +1,18 @@
 import pygame
 from enum import Enum
-import random
 
-from config import FONT_SIZE
+from config import FONT_SIZE, MIX_OPTION_REACTIONS, RECENT_OPTIONS
+from render_cache import FontPool, FittedTextCache
+from text_layout import TextLayoutCache
+from assets import asset_manager
+from option_sampler import OptionSampler
+from log import log
+
+# Shared across frames so option labels are only laid out once per shuffle
+font_pool = FontPool()
+fitted_text_cache = FittedTextCache(font_pool, max_entries=256)
+# Line breaks and line surfaces for speech bubbles
+text_layout_cache = TextLayoutCache(font_pool)
 
 class DialogueCharacteristic(Enum):
     BODY_COMMENT = "body comments"
@@ -27,11 +37,23 @@ class DialogueCharacteristic(Enum):
     TEASE = "tease"
     
 
+def option_rects(screen_height, count):
+    """Rects of the option boxes in visual order (bottom to top); each overlaps the one below."""
+    box_height = 210
+    gap = -100
+    box_width = 500
+    start_y = screen_height - 40 - box_height
+    x = 50
+    return [pygame.Rect(x, start_y - idx * (box_height + gap), box_width, box_height) for idx in range(count)]
+
+
 class DialogueSystem:
-    def __init__(self, screen_width, screen_height):
+    def __init__(self, screen_width, screen_height, character=None):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.dialogue_options_list = dialogue_options  # Use the existing dialogue_options list
+        self.sampler = OptionSampler(self.dialogue_options_list, recent=RECENT_OPTIONS)
+        self.character = character
         self.selected_dialogue_options = self.select_random_dialogue_options()
         # Load the background image for dialogue options
         self.option_background = None
@@ -46,37 +68,49 @@ class DialogueSystem:
         
         for path in possible_paths:
             try:
-                self.option_background = pygame.image.load(path).convert_alpha()
-                print(f"Successfully loaded dialogue background from: {path}")
+                self.option_background = asset_manager.image(path, alpha=True)
+                log.debug("Loaded dialogue background from: %s", path)
                 break
             except (pygame.error, FileNotFoundError):
                 continue
                 
         if self.option_background is None:
-            print("Warning: Could not load dialogue background image. Using stone box instead.")
+            log.warning("Could not load dialogue background image. Using stone box instead.")
+        elif self.option_background.get_size() != (500, 210):
+            # Scaled once here rather than on every draw of the options
+            self.option_background = pygame.transform.scale(self.option_background, (500, 210))
+
+    def start_encounter(self, character):
+        """New character: options from the last encounter may show up again."""
+        self.character = character
+        self.sampler.reset()
+        self.selected_dialogue_options = self.select_random_dialogue_options()
 
     def select_random_dialogue_options(self):
-        # Shuffle the list of dialogue options and select the first 4 unique options
-        random.shuffle(self.dialogue_options_list)
-        return self.dialogue_options_list[:4]
+        # Draw 4 unique options without reordering the shared list
+        return self.sampler.sample(4, self.character, mix=MIX_OPTION_REACTIONS)
+
+    def layout_dialogue_options(self):
+        """Assign option rects and return the area the options (and their shadows) cover."""
+        rects = option_rects(self.screen_height, len(self.selected_dialogue_options))
+        for option, rect in zip(self.selected_dialogue_options, rects):
+            option.rect = rect
+
+        rects = [option.rect for option in self.selected_dialogue_options]
+        bounds = rects[0].unionall(rects[1:])
+        # The stone box fallback draws a shadow 6px down and right
+        bounds.width += 6
+        bounds.height += 6
+        return bounds
 
     def draw_dialogue_options(self, screen, font):
-        box_height = 210
-        gap = -100
         box_width = 500
-        start_y = self.screen_height - 40 - box_height
-        x = 50
-
-        # Assign rects in visual order (bottom to top)
-        for idx, option in enumerate(self.selected_dialogue_options):
-            y = start_y - idx * (box_height + gap)
-            option.rect = pygame.Rect(x, y, box_width, box_height)
+        self.layout_dialogue_options()
 
         # Draw from bottom to top so the top option appears on top when overlapping
         for option in self.selected_dialogue_options[::-1]:
             if self.option_background:
-                scaled_bg = pygame.transform.scale(self.option_background, (box_width, box_height))
-                screen.blit(scaled_bg, option.rect)
+                screen.blit(self.option_background, option.rect)
             else:
                 stone_gray = (120, 120, 120)
                 border_light = (200, 200, 200)
@@ -90,7 +124,7 @@ class DialogueSystem:
         # Check from top to bottom (visually), so topmost option is checked first
         for option in reversed(self.selected_dialogue_options):
             if option.rect.collidepoint(pos):
-                print(f"Selected: {option.text}")
+                log.debug("Selected: %s", option.text)
                 return option
         return None
 
@@ -111,18 +145,9 @@ def draw_stone_box(screen, rect, base_color, border_color, border_radius=10):
     pygame.draw.rect(screen, border_color, rect, width=4, border_radius=border_radius)
 
 def draw_text(text, font, color, surface, x, y, max_width=None, size_reduction=1):
-    # Create a temporary font with reduced size
-    font_size = int(FONT_SIZE / size_reduction)  # Reduce font size by the specified factor
-    temp_font = pygame.font.SysFont(None, font_size)
-    
-    # Adjust font size based on the length of the text and the max width of the box
-    if max_width is not None:
-        while temp_font.size(text)[0] > max_width and font_size > 12:  # Lower minimum font size
-            font_size -= 1
-            temp_font = pygame.font.SysFont(None, font_size)
-
-    # Render the text
-    textobj = temp_font.render(text, True, color)
+    # Reduce font size by the specified factor, then let the cache shrink it to fit
+    font_size = int(FONT_SIZE / size_reduction)
+    textobj, _ = fitted_text_cache.render(text, color, font_size, max_width=max_width)
     textrect = textobj.get_rect()
     textrect.center = (x, y)
     surface.blit(textobj, textrect)
@@ -132,6 +157,7 @@ class DialogueOption:
     def __init__(self, text, characteristics):
         self.text = text
         self.characteristics = characteristics
+        self.mask = None  # filled in by traits.option_mask
         self.rect = pygame.Rect(0, 0, 500, 210)  # Keep the large box size
 
     def __repr__(self):
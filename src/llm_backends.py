@@ -0,0 +1,185 @@
+"""LLM backends behind get_npc_response.
+
+Every backend has a model_name and implements
+    generate(prompt, model=None) -> (text, tokens_used)
+    stream(prompt, on_chunk, model=None) -> full text
+so the game can run against Gemini, an in-process mock, or the bundled
+stand-in server (standin_server.py) without code changes.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_MODEL = "gemma-3-27b-it"
+
+MOCK_REPLIES = [
+    "Hm. Say that again and we'll see.",
+    "Well, that is unexpected. Go on.",
+    "I like that. Tell me more.",
+    "Not today, stranger.",
+    "You talk a lot. I'm listening though.",
+    "Careful. This place has ears.",
+]
+
+
+class BackendError(Exception):
+    pass
+
+
+def mock_reply(prompt, seed=0):
+    """Deterministic reply and a stable per-prompt random source."""
+    digest = int(hashlib.sha256(f"{seed}:{prompt}".encode("utf-8")).hexdigest(), 16)
+    return MOCK_REPLIES[digest % len(MOCK_REPLIES)], random.Random(digest)
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class LLMBackend:
+    name = "base"
+
+    def __init__(self, model_name=DEFAULT_MODEL):
+        self.model_name = model_name
+
+    def generate(self, prompt, model=None):
+        raise NotImplementedError
+
+    def stream(self, prompt, on_chunk, model=None):
+        # Backends without native streaming deliver the reply as one chunk
+        text, _ = self.generate(prompt, model)
+        on_chunk(text)
+        return text
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL):
+        super().__init__(model_name)
+        from google import genai
+        self.client = genai.Client(api_key=api_key)
+
+    def generate(self, prompt, model=None):
+        response = self.client.models.generate_content(
+            model=model or self.model_name,
+            contents=[prompt]
+        )
+        usage = response.usage_metadata
+        tokens = usage.total_token_count if usage and usage.total_token_count else 0
+        return response.text.strip(), tokens
+
+    def stream(self, prompt, on_chunk, model=None):
+        parts = []
+        for chunk in self.client.models.generate_content_stream(
+            model=model or self.model_name,
+            contents=[prompt]
+        ):
+            if chunk.text:
+                parts.append(chunk.text)
+                on_chunk(chunk.text)
+        return "".join(parts).strip()
+
+
+class MockBackend(LLMBackend):
+    """In-process deterministic backend: same prompt, same reply and latency."""
+
+    name = "mock"
+
+    def __init__(self, model_name=DEFAULT_MODEL, latency_ms=50, jitter_ms=20, error_rate=0.0, seed=0):
+        super().__init__(model_name)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def _prepare(self, prompt, model):
+        text, rng = mock_reply(f"{model or self.model_name}:{prompt}", self.seed)
+        delay = max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        # Errors are transient: drawn per call so a retry of the same prompt can succeed
+        if random.Random(f"{self.seed}:{call}").random() < self.error_rate:
+            time.sleep(delay)
+            raise BackendError("mock backend injected error")
+        return text, delay
+
+    def generate(self, prompt, model=None):
+        text, delay = self._prepare(prompt, model)
+        time.sleep(delay)
+        return text, estimate_tokens(prompt) + estimate_tokens(text)
+
+    def stream(self, prompt, on_chunk, model=None):
+        text, delay = self._prepare(prompt, model)
+        words = text.split(" ")
+        # Half the latency before the first token, the rest spread over the chunks
+        time.sleep(delay / 2)
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(delay / 2 / len(words))
+            on_chunk(word if i == 0 else " " + word)
+        return text
+
+
+class HttpBackend(LLMBackend):
+    """Client for standin_server.py (or anything speaking the same protocol).
+
+    POST {url}/generate with {"model", "prompt", "stream"}. Plain requests get
+    {"text", "tokens"}; streaming ones get one JSON object per line, each
+    {"text": chunk}, ending with {"done": true, "tokens": n}.
+    """
+
+    name = "http"
+
+    def __init__(self, url, model_name=DEFAULT_MODEL, timeout=30):
+        super().__init__(model_name)
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, prompt, model, stream):
+        body = json.dumps({"model": model or self.model_name, "prompt": prompt, "stream": stream}).encode("utf-8")
+        request = urllib.request.Request(self.url + "/generate", data=body,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise BackendError(f"stand-in server returned {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+        except urllib.error.URLError as e:
+            raise BackendError(f"stand-in server unreachable: {e.reason}") from e
+
+    def generate(self, prompt, model=None):
+        with self._post(prompt, model, stream=False) as response:
+            data = json.loads(response.read().decode("utf-8"))
+        return data["text"].strip(), data.get("tokens", 0)
+
+    def stream(self, prompt, on_chunk, model=None):
+        parts = []
+        with self._post(prompt, model, stream=True) as response:
+            for line in response:
+                if not line.strip():
+                    continue
+                data = json.loads(line.decode("utf-8"))
+                if "error" in data:
+                    raise BackendError(data["error"])
+                if data.get("done"):
+                    break
+                parts.append(data["text"])
+                on_chunk(data["text"])
+        return "".join(parts).strip()
+
+
+def create_backend(kind, api_key=None, url=None, model_name=DEFAULT_MODEL, **options):
+    if kind == "gemini":
+        return GeminiBackend(api_key, model_name)
+    if kind == "mock":
+        return MockBackend(model_name, **options)
+    if kind == "http":
+        return HttpBackend(url or "http://127.0.0.1:8765", model_name)
+    raise ValueError(f"Unknown LLM backend: {kind}")
@@ -0,0 +1,63 @@
+"""Leveled, rate-limited logging for the game.
+
+    from log import log
+    log.info("AI Response: %s", text)
+
+Each call site (file and line) may log at most RATE_LIMIT_BURST messages
+per RATE_LIMIT_WINDOW seconds; the rest are dropped and counted, and the
+count is reported with the next message that gets through. Warnings and
+errors are never dropped. Output goes to whatever sys.stdout is at the
+time, so redirecting stdout (as the simulator does) still works.
+"""
+import logging
+import sys
+import threading
+import time
+
+RATE_LIMIT_WINDOW = 5.0
+RATE_LIMIT_BURST = 10
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, window=RATE_LIMIT_WINDOW, burst=RATE_LIMIT_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.sites = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            start, sent, dropped = self.sites.get(site, (now, 0, 0))
+            if now - start >= self.window:
+                start, sent = now, 0
+            if sent >= self.burst:
+                self.sites[site] = (start, sent, dropped + 1)
+                return False
+            self.sites[site] = (start, sent + 1, 0)
+        if dropped:
+            record.msg = f"{record.msg} ({dropped} similar messages suppressed)"
+        return True
+
+
+class StdoutHandler(logging.StreamHandler):
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+log = logging.getLogger("visual_novel")
+log.setLevel(logging.INFO)
+log.propagate = False
+_handler = StdoutHandler()
+_handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+_handler.addFilter(RateLimitFilter())
+log.addHandler(_handler)
+
+
+def set_level(level):
+    log.setLevel(level.upper() if isinstance(level, str) else level)
@@ -0,0 +1,100 @@
+import time
+
+import pygame
+
+from config import FPS_CAP, IDLE_MODE, IDLE_WAKEUP_MS
+from debug_overlay import DEBUG_OVERLAY_KEY, debug_overlay
+from log import log
+from metrics import metrics
+
+# One driver per named loop so stats survive re-entering menus
+_drivers = {}
+# The driver that ran the most recent frame; time spent in other loops isn't
+# charged to a driver that is suspended under them
+_active = None
+# Optional callable(driver) -> list of events to inject, used by the headless simulator
+event_hook = None
+
+
+def loop_driver(name):
+    driver = _drivers.get(name)
+    if driver is None:
+        driver = LoopDriver(name)
+        _drivers[name] = driver
+    return driver
+
+
+def report_all():
+    for driver in _drivers.values():
+        driver.report()
+
+
+class LoopDriver:
+    """Paces a loop to FPS_CAP and sleeps on the event queue when nothing is animating.
+
+    Call events() once per frame in place of pygame.event.get(). Pass
+    animating=True while something on screen changes without input (a timer,
+    an in-flight request); otherwise the call blocks until the next event or
+    IDLE_WAKEUP_MS, so a static screen costs next to no CPU.
+    """
+
+    def __init__(self, name, fps=FPS_CAP, idle=IDLE_MODE):
+        self.name = name
+        self.fps = fps
+        self.idle = idle
+        self.clock = pygame.time.Clock()
+        self.frames = 0
+        self.idle_frames = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.last = None
+        self.returned_at = None
+
+    def events(self, animating=False):
+        global _active
+        now = (time.perf_counter(), time.process_time())
+        if _active is self and self.last is not None:
+            self.wall_time += now[0] - self.last[0]
+            self.cpu_time += now[1] - self.last[1]
+            # Whole frame, and the part of it spent drawing and handling events
+            metrics.observe("frame_ms", (now[0] - self.last[0]) * 1000, loop=self.name)
+            metrics.observe("draw_ms", (now[0] - self.returned_at) * 1000, loop=self.name)
+        _active = self
+        self.last = now
+        self.frames += 1
+        if event_hook is not None:
+            for event in event_hook(self):
+                pygame.event.post(event)
+
+        events = []
+        if self.idle and not animating:
+            self.idle_frames += 1
+            event = pygame.event.wait(IDLE_WAKEUP_MS)
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+        self.clock.tick(self.fps)
+        events.extend(pygame.event.get())
+        for event in events:
+            if event.type == pygame.KEYDOWN and event.key == DEBUG_OVERLAY_KEY:
+                debug_overlay.toggle()
+        self.returned_at = time.perf_counter()
+        return events
+
+    def stats(self):
+        wall = self.wall_time
+        cpu = self.cpu_time
+        return {
+            "frames": self.frames,
+            "idle_frames": self.idle_frames,
+            "fps": self.frames / wall if wall else 0.0,
+            "recent_fps": self.clock.get_fps(),
+            "cpu_time": cpu,
+            "cpu_percent": 100.0 * cpu / wall if wall else 0.0,
+        }
+
+    def report(self):
+        if not self.frames:
+            return
+        stats = self.stats()
+        log.debug("%s: %d frames, %.1f fps (recent %.1f), CPU %.2fs (%.0f%%)", self.name, stats["frames"],
+                  stats["fps"], stats["recent_fps"], stats["cpu_time"], stats["cpu_percent"])
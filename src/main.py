@@ -1,14 +1,37 @@
 import pygame
 import sys
-from dialogue import DialogueSystem, DialogueOption, DialogueCharacteristic
-from characters import Character, Background, TRAIT_PROMPTS, TRAIT_REACTIONS
-from config import FONT_SIZE
+from dialogue import DialogueSystem, DialogueOption, DialogueCharacteristic, font_pool, fitted_text_cache, text_layout_cache
+from characters import TRAIT_PROMPTS, TRAIT_REACTIONS
+from config import (FONT_SIZE, LLM_DEADLINE_S, LLM_MAX_RETRIES, LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN_S, LLM_HEDGE,
+                    LLM_MODEL_TIERS, LLM_ROUTE_LONG_PROMPT_CHARS, LLM_ROUTE_FIRST_TURN, LLM_MAX_REPLY_CHARS,
+                    SUPPORTED_RESOLUTIONS)
+from render_cache import ScaledSurfaceCache
+from npc_worker import NpcResponseWorker, NPC_RESPONSE_EVENT, NPC_CHUNK_EVENT
+from text_layout import IncrementalWrapper, max_lines_for
+from prefetch import SpeculativePrefetcher
+from response_cache import ResponseCache
+from scene import DialogueScene
+from context import ConversationContext, format_turns
+from loop import loop_driver, report_all
+from llm_backends import create_backend, DEFAULT_MODEL
+from resilient import ResilientBackend, CircuitBreaker
+from model_router import ModelRouter
+from transitions import Fade, EncounterPreparer
+from ui import Menu, Button, Label, FLAT
+from metrics import metrics, SIZE_BUCKETS
+from debug_overlay import debug_overlay
+from log import log, set_level
 import getpass
-from google import genai
+import argparse
 import csv
+import functools
+import os
 
 import random
-from characters import PREDEFINED_CHARACTERS
+import time
+from characters import preload_paths, background_path, character_sprite_path
+from assets import asset_manager
+from asset_pack import load_asset_pack, character_size
 
 # Initialize Pygame
 pygame.init()
@@ -20,39 +43,104 @@ WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 FONT_SIZE = 36
 
-# Set up the display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Visual Novel")
+# The display is opened by setup_display so importing this module has no side effects
+screen = None
 
 # Set up fonts
 font = pygame.font.SysFont(None, FONT_SIZE)
 
-def draw_text(text, font, color, surface, x, y):
-    textobj = font.render(text, True, color)
-    textrect = textobj.get_rect()
-    textrect.center = (x, y)
-    surface.blit(textobj, textrect)
-
-def fade_to_black(surface, duration=1000):
-    fade = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    fade.fill((0, 0, 0))
-    for alpha in range(0, 255, 10):
-        fade.set_alpha(alpha)
-        surface.blit(fade, (0, 0))
+# Pre-scaled backgrounds and character sprites for the current resolution
+scaled_cache = ScaledSurfaceCache()
+
+# Player lines per encounter before moving on to the next location
+EXCHANGES_PER_ENCOUNTER = 5
+
+# Length of the fade between encounters
+FADE_DURATION_MS = 1000
+
+def display_format(surface):
+    return (surface.get_bitsize(), surface.get_masks())
+
+def setup_display(width, height):
+    """Open the window, or resize it in place, and prepare the resolution-dependent assets"""
+    global SCREEN_WIDTH, SCREEN_HEIGHT, screen
+    if screen is not None and (width, height) == (SCREEN_WIDTH, SCREEN_HEIGHT):
+        return
+    old_format = display_format(screen) if screen is not None else None
+    previous_entries = scaled_cache.entries()
+    SCREEN_WIDTH = width
+    SCREEN_HEIGHT = height
+    # set_mode on the existing display keeps pygame, fonts and loaded images alive
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Visual Novel")
+    # Pre-scaled raw pixels if a pack was built for this resolution, PNGs otherwise
+    pack = load_asset_pack(SCREEN_WIDTH, SCREEN_HEIGHT)
+    asset_manager.use_pack(pack)
+    if display_format(screen) != old_format:
+        asset_manager.convert_all()
+    scaled_cache.set_resolution(SCREEN_WIDTH, SCREEN_HEIGHT)
+    # Packs are already scaled; without one, rescale what was on screen in the background
+    if pack is None and previous_entries:
+        scaled_cache.prewarm(rescale_jobs(previous_entries))
+
+def rescale_jobs(entries):
+    """prewarm jobs for scaled_cache entries, read from the full-size decoded images"""
+    height = SCREEN_HEIGHT
+    jobs = []
+    for (kind, name), expression in entries:
+        if kind == "background":
+            path = background_path(name)
+            size_for = lambda source, size=(SCREEN_WIDTH, SCREEN_HEIGHT): size
+            smooth = False
+        else:
+            path = character_sprite_path(name, expression)
+            size_for = lambda source: character_size(source.get_size(), height)
+            smooth = True
+        jobs.append(((kind, name), expression, lambda path=path: asset_manager.decode(path), size_for, smooth))
+    return jobs
+
+# Where quit_game writes the metrics (.prom for Prometheus text, JSON lines otherwise)
+METRICS_EXPORT_PATH = None
+
+def quit_game():
+    report_all()
+    if METRICS_EXPORT_PATH:
+        metrics.export(METRICS_EXPORT_PATH)
+        log.info("Metrics written to %s", METRICS_EXPORT_PATH)
+    # Drop queued requests; whatever is in flight finds pygame gone and posts nothing
+    npc_worker.shutdown()
+    prefetcher.shutdown()
+    if backend is not None:
+        backend.shutdown()
+    pygame.quit()
+    sys.exit()
+
+def run_fade(surface, fade, snapshot):
+    """Draw fade over snapshot once per frame until it finishes, handling events as usual"""
+    while True:
+        finished = fade.done()
+        surface.blit(snapshot, (0, 0))
+        fade.draw(surface)
+        debug_overlay.draw(surface)
         pygame.display.update()
-        pygame.time.delay(duration // 25)
-
-def pick_new_character(exclude_index=None):
-    indices = list(range(len(PREDEFINED_CHARACTERS)))
-    if exclude_index is not None:
-        indices.remove(exclude_index)
-    idx = random.choice(indices)
-    char_info = PREDEFINED_CHARACTERS[idx]
-    bg_name = random.choice(char_info["backgrounds"])
-    character = Character(char_info["name"], char_info["character_name"], char_info["char_type"], char_info["traits"])
-    background = Background(bg_name)
-    return character, background, idx
+        if finished:
+            return
+        for event in loop_driver("transition").events(animating=True):
+            if event.type == pygame.QUIT:
+                quit_game()
+
+def fade_to_black(surface, duration=None):
+    if duration is None:
+        duration = FADE_DURATION_MS
+    run_fade(surface, Fade(duration), surface.copy())
+
+def fade_from_black(surface, duration=None):
+    """Fade in whatever is on surface now"""
+    if duration is None:
+        duration = FADE_DURATION_MS // 2
+    run_fade(surface, Fade(duration, fade_in=True), surface.copy())
 
+@functools.lru_cache(maxsize=None)
 def load_logo_image():
     """Helper function to load the logo image"""
     try:
@@ -86,85 +174,51 @@ def load_logo_image():
         print("WARNING: Could not load logo image from any path. Using black background instead.")
         return None
 
-def main_menu():
-    # Load the logo image
-    logo_image = load_logo_image()
-    
-    # Create a semi-transparent overlay for better text visibility
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 128))  # Semi-transparent black
-    
-    while True:
-        # Clear the screen
-        screen.fill(BLACK)
-        
-        # Draw the logo if available
+def logo_backdrop(dim_alpha):
+    """Menu backdrop: the logo scaled to the window and dimmed, or plain black without one"""
+    def draw(surface):
+        surface.fill(BLACK)
+        logo_image = load_logo_image()
         if logo_image:
-            # Scale the logo to fit the screen
-            scaled_logo = pygame.transform.scale(logo_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            screen.blit(scaled_logo, (0, 0))
-            
-            # Add semi-transparent overlay for better text visibility
-            screen.blit(overlay, (0, 0))
-        else:
-            # If logo couldn't be loaded, just use black background
-            screen.fill(BLACK)
-        
-        # Draw the title
-        title_font = pygame.font.SysFont(None, FONT_SIZE * 2)  # Larger font for title
-        # draw_text('Visual Novel', title_font, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4)
-
-        mx, my = pygame.mouse.get_pos()
-
-        # Create button rectangles
-        button_width = 200
-        button_height = 50
-        button_1 = pygame.Rect(SCREEN_WIDTH // 2 - button_width // 2, SCREEN_HEIGHT // 2 - 50, button_width, button_height)
-        button_2 = pygame.Rect(SCREEN_WIDTH // 2 - button_width // 2, SCREEN_HEIGHT // 2 + 20, button_width, button_height)
-        button_3 = pygame.Rect(SCREEN_WIDTH // 2 - button_width // 2, SCREEN_HEIGHT // 2 + 90, button_width, button_height)
-        
-        # Draw buttons with hover effect
-        for button, text, y_pos in [
-            (button_1, "Play", SCREEN_HEIGHT // 2 - 25),
-            (button_2, "Options", SCREEN_HEIGHT // 2 + 45),
-            (button_3, "Quit", SCREEN_HEIGHT // 2 + 115)
-        ]:
-            # Check if mouse is over button
-            if button.collidepoint((mx, my)):
-                button_color = (100, 100, 100)  # Lighter when hovered
-            else:
-                button_color = (50, 50, 50)  # Darker when not hovered
-                
-            # Draw button with border
-            pygame.draw.rect(screen, WHITE, button, border_radius=10)  # Border
-            pygame.draw.rect(screen, button_color, button.inflate(-4, -4), border_radius=8)  # Button
-            draw_text(text, font, WHITE, screen, button.centerx, button.centery)
+            surface.blit(pygame.transform.scale(logo_image, surface.get_size()), (0, 0))
+            overlay = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, dim_alpha))
+            surface.blit(overlay, (0, 0))
+    return draw
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if button_1.collidepoint((mx, my)):
-                    game_loop()  # Start the game
-                if button_2.collidepoint((mx, my)):
-                    options_menu()  # Open options menu
-                if button_3.collidepoint((mx, my)):
-                    pygame.quit()
-                    sys.exit()
+def stacked_buttons(width, height, entries):
+    """A centered column of 200x50 buttons for (text, value) entries"""
+    return [Button((width // 2 - 100, height // 2 - 50 + i * 70, 200, 50), text, value)
+            for i, (text, value) in enumerate(entries)]
 
-        pygame.display.update()
+def main_menu_layout(width, height):
+    return logo_backdrop(128), [], stacked_buttons(width, height, [("Play", "play"), ("Options", "options"), ("Quit", "quit")])
+
+main_menu_view = Menu("main_menu", main_menu_layout, font)
+
+def main_menu():
+    # Warm the asset cache while the player looks at the menu
+    asset_manager.preload(preload_paths())
+
+    def on_click(choice):
+        if choice == "play":
+            game_loop()
+        elif choice == "options":
+            options_menu()
+        else:
+            quit_game()
+
+    main_menu_view.run(on_click, quit_game)
 
 def build_ai_prompt(character, background, conversation_history, player_message):
     # Get trait description
     trait_desc = " ".join([TRAIT_PROMPTS.get(trait, "") for trait in character.personality_traits])
     env_desc = f"The environment is {background}."
-    # Format conversation history
-    history_lines = []
-    for entry in conversation_history:
-        history_lines.append(f"Player: {entry['player']}")
-        history_lines.append(f"NPC: {entry['npc']}")
-    history_text = " ".join(history_lines)
+    # Format conversation history, a ConversationContext keeps it within budget
+    if isinstance(conversation_history, ConversationContext):
+        history_text = conversation_history.history_text()
+    else:
+        history_text = format_turns(conversation_history)
     # Build prompt
     prompt = (
         f"{trait_desc} {env_desc} Previous interactions: {history_text} "
@@ -173,176 +227,225 @@ def build_ai_prompt(character, background, conversation_history, player_message)
     )
     return prompt
 
-def get_npc_response(client, model_name, prompt):
-    response = client.models.generate_content(
-        model=model_name,
-        contents=[prompt]
-    )
-    print(f"AI Response: {response.text.strip()}")
-    return response.text.strip()
+def generate_npc_response(backend, prompt, model=None, deadline=None):
+    """Return the NPC reply together with the number of tokens it cost"""
+    model_name = model or backend.model_name
+    cached = response_cache.get(model_name, prompt) if response_cache is not None else None
+    if cached is not None:
+        metrics.count("llm_requests", source="cache")
+        return cached, 0
+    metrics.count("llm_requests", source=backend.name)
+    with metrics.timer("llm_total_ms", backend=backend.name):
+        text, tokens = backend.generate(prompt, model, deadline=deadline)
+    if response_cache is not None:
+        response_cache.put(model_name, prompt, text)
+    return text, tokens
+
+def stream_model_response(backend, prompt, on_chunk, model=None, deadline=None):
+    """Like generate_npc_response, but hands each partial chunk to on_chunk as it arrives"""
+    model_name = model or backend.model_name
+    cached = response_cache.get(model_name, prompt) if response_cache is not None else None
+    if cached is not None:
+        metrics.count("llm_requests", source="cache")
+        on_chunk(cached)
+        return cached, 0
+    metrics.count("llm_requests", source=backend.name)
+    started = time.perf_counter()
+    first_chunk = []
+
+    def timed_chunk(chunk):
+        if not first_chunk:
+            first_chunk.append(True)
+            metrics.observe("llm_ttft_ms", (time.perf_counter() - started) * 1000, backend=backend.name)
+        on_chunk(chunk)
+
+    text = backend.stream(prompt, timed_chunk, model, deadline=deadline)
+    metrics.observe("llm_total_ms", (time.perf_counter() - started) * 1000, backend=backend.name)
+    if response_cache is not None:
+        response_cache.put(model_name, prompt, text)
+    return text, 0
+
+def routed_npc_response(backend, prompt, first_turn=False):
+    """generate_npc_response on the model tier picked by model_router"""
+    return model_router.reply(lambda p, model, deadline: generate_npc_response(backend, p, model, deadline),
+                              prompt, first_turn)
+
+def get_npc_response(backend, prompt, first_turn=False):
+    text, _ = routed_npc_response(backend, prompt, first_turn)
+    log.info("AI Response: %s", text)
+    return text
+
+def stream_npc_response(backend, prompt, first_turn, on_chunk):
+    """Like get_npc_response, but streams the reply that is used to on_chunk"""
+    text, _ = model_router.reply(
+        lambda p, model, deadline, chunk: stream_model_response(backend, p, chunk, model, deadline),
+        prompt, first_turn, on_chunk=on_chunk)
+    log.info("AI Response: %s", text)
+    return text
 
 def prompt_for_api_key():
     print("Please enter your Gemini API key (input hidden):")
     return getpass.getpass("API Key: ")
 
-# Prompt for API key and initialize Gemini client
-api_key = prompt_for_api_key()
-client = genai.Client(api_key=api_key)
-model_name = "gemma-3-27b-it"
-
-def restart_game(new_width, new_height):
-    """Completely restart the game with new resolution settings"""
-    global SCREEN_WIDTH, SCREEN_HEIGHT, screen, font
-    
-    # Update the global variables
-    SCREEN_WIDTH = new_width
-    SCREEN_HEIGHT = new_height
-    
-    # Quit pygame completely
-    pygame.quit()
-    
-    # Restart pygame from scratch
-    pygame.init()
-    
-    # Set up the display with new dimensions
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Visual Novel")
-    
-    # Reinitialize font
-    font = pygame.font.SysFont(None, FONT_SIZE)
-    
-    # Start the game from the main menu
-    main_menu()
+# LLM backend behind get_npc_response, created by setup_backend
+backend = None
+# Which model tier answers each turn
+model_router = ModelRouter(LLM_MODEL_TIERS, long_prompt_chars=LLM_ROUTE_LONG_PROMPT_CHARS,
+                           escalate_first_turn=LLM_ROUTE_FIRST_TURN, max_reply_chars=LLM_MAX_REPLY_CHARS,
+                           turn_deadline_s=LLM_DEADLINE_S)
+
+def setup_backend(kind="gemini", api_key=None, url=None, model_name=DEFAULT_MODEL, **options):
+    """Create the LLM backend, prompting for the Gemini API key if needed"""
+    global backend
+    if kind == "gemini" and api_key is None:
+        api_key = prompt_for_api_key()
+    backend = make_resilient(create_backend(kind, api_key=api_key, url=url, model_name=model_name, **options))
+
+def make_resilient(inner):
+    """Bound every LLM call so a slow or failing backend falls back to a canned reply"""
+    return ResilientBackend(inner, deadline_s=LLM_DEADLINE_S, max_retries=LLM_MAX_RETRIES,
+                            breaker=CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN_S),
+                            hedge=LLM_HEDGE)
+
+# Replies to prompts we've already sent are served from disk. Kiosks with a
+# pre-warmed cache run with --response-cache-read-only to leave the file untouched.
+RESPONSE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "npc_responses.sqlite3")
+RESPONSE_CACHE_READ_ONLY = False
+# Opened by setup_response_cache; without one every prompt goes to the backend
+response_cache = None
+
+def setup_response_cache(path=None, read_only=None):
+    global response_cache
+    response_cache = ResponseCache(path or RESPONSE_CACHE_PATH, max_entries=5000, max_age=30 * 24 * 3600,
+                                   read_only=RESPONSE_CACHE_READ_ONLY if read_only is None else read_only)
+
+# NPC requests run here so the render loop never waits on the network
+npc_worker = NpcResponseWorker()
+# Show replies as they are generated instead of waiting for the full text
+stream_responses = True
+# Opt-in: request replies for all four visible options before the player clicks
+speculative_prefetch = False
+prefetcher = SpeculativePrefetcher(lambda prompt, first_turn: routed_npc_response(backend, prompt, first_turn),
+                                   max_concurrent=2)
+
+# Hit rates shown in the debug overlay and exported with the metrics
+# (looked up on each read, the simulator swaps some of these out)
+metrics.add_source("scaled_surfaces", lambda: scaled_cache.stats())
+metrics.add_source("fitted_text", lambda: fitted_text_cache.stats())
+metrics.add_source("text_layout", lambda: text_layout_cache.stats())
+metrics.add_source("responses", lambda: response_cache.stats() if response_cache is not None else {})
+metrics.add_source("prefetch", lambda: prefetcher.stats())
+
+def summarize_conversation(previous_summary, turns):
+    """Fold older turns into the running summary, called off the render thread"""
+    prompt = (
+        f"Summary so far: {previous_summary or 'none'} "
+        f"New exchanges: {format_turns(turns)} "
+        "Update the summary of this conversation between the Player and the NPC in at most two short sentences. "
+        "Keep names, promises and how the NPC feels about the player. Reply with the summary only."
+    )
+    text, _ = generate_npc_response(backend, prompt, model_router.fastest())
+    return text
+
+def new_conversation():
+    # Every exchange plus the NPC's opening line
+    return ConversationContext(summarize=summarize_conversation, keep_turns=4, max_chars=1500,
+                               max_turns=EXCHANGES_PER_ENCOUNTER + 1)
+
+def build_opening_prompt(char_info, background_name):
+    trait_desc = " ".join([TRAIT_PROMPTS.get(trait, "") for trait in char_info["traits"]])
+    return (
+        f"{trait_desc} The environment is {background_name}. The player has just walked up to the NPC. "
+        "The NPC should greet the player in character, in 1 very short sentence, with the appropriate tone. "
+        "Do not use any emojis just regular words and keep it simple."
+    )
 
-def options_menu():
-    global SCREEN_WIDTH, SCREEN_HEIGHT, screen
-    
-    # Store original dimensions
-    original_width, original_height = SCREEN_WIDTH, SCREEN_HEIGHT
-    
-    # Load the logo image
-    logo_image = load_logo_image()
-    
-    # Create overlay
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 160))
-    
-    while True:
-        # Clear the screen
-        screen.fill(BLACK)
-        
-        # Draw the logo if available
-        if logo_image:
-            scaled_logo = pygame.transform.scale(logo_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-            screen.blit(scaled_logo, (0, 0))
-            screen.blit(overlay, (0, 0))
-        else:
-            # If logo couldn't be loaded, just use black background
-            screen.fill(BLACK)
-        
-        # Draw the title
-        draw_text('Options Menu', font, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4)
-
-        mx, my = pygame.mouse.get_pos()
-
-        # Create button rectangles
-        button_width = 200
-        button_height = 50
-        button_1 = pygame.Rect(SCREEN_WIDTH // 2 - button_width // 2, SCREEN_HEIGHT // 2 - 50, button_width, button_height)
-        button_2 = pygame.Rect(SCREEN_WIDTH // 2 - button_width // 2, SCREEN_HEIGHT // 2 + 20, button_width, button_height)
-        button_3 = pygame.Rect(SCREEN_WIDTH // 2 - button_width // 2, SCREEN_HEIGHT // 2 + 90, button_width, button_height)
-        button_4 = pygame.Rect(SCREEN_WIDTH // 2 - button_width // 2, SCREEN_HEIGHT // 2 + 160, button_width, button_height)
-        
-        # Draw buttons with hover effect
-        for button, text, y_pos in [
-            (button_1, "800x600", SCREEN_HEIGHT // 2 - 25),
-            (button_2, "1024x768", SCREEN_HEIGHT // 2 + 45),
-            (button_3, "1920x1080", SCREEN_HEIGHT // 2 + 115),
-            (button_4, "Back to Menu", SCREEN_HEIGHT // 2 + 185)
-        ]:
-            # Check if mouse is over button
-            if button.collidepoint((mx, my)):
-                button_color = (100, 100, 100)  # Lighter when hovered
-            else:
-                button_color = (50, 50, 50)  # Darker when not hovered
-
-            # Draw button with border
-            pygame.draw.rect(screen, WHITE, button, border_radius=10)  # Border
-            pygame.draw.rect(screen, button_color, button.inflate(-4, -4), border_radius=8)  # Button
-            draw_text(text, font, WHITE, screen, button.centerx, button.centery)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if button_1.collidepoint((mx, my)):
-                    if SCREEN_WIDTH != 800 or SCREEN_HEIGHT != 600:
-                        restart_game(800, 600)
-                        return  # This return is important as we've restarted the game
-                
-                if button_2.collidepoint((mx, my)):
-                    if SCREEN_WIDTH != 1024 or SCREEN_HEIGHT != 768:
-                        restart_game(1024, 768)
-                        return  # This return is important as we've restarted the game
-                
-                if button_3.collidepoint((mx, my)):
-                    restart_game(1920, 1080)
-                    return  # This return is important as we've restarted the game
-                if button_4.collidepoint((mx, my)):
-                    # Go back to main menu
-                    return
-        pygame.display.update()
+def request_opening_line(char_info, background_name):
+    text, _ = routed_npc_response(backend, build_opening_prompt(char_info, background_name), first_turn=True)
+    return text
+
+def prewarm_scaled(entries):
+    # Packs are already scaled, only PNGs need the background work
+    if asset_manager.pack is None:
+        scaled_cache.prewarm(rescale_jobs(entries))
 
-def draw_speech_bubble(text, font, color, surface, center_x, bottom_y, bubble_width=500, bubble_height=150, bubble_color=(255, 255, 255), border_color=(0, 0, 0), border_width=3):
+# The next character and background load while the current encounter wraps up
+encounter_preparer = EncounterPreparer(prewarm_scaled, opening=request_opening_line)
+# Opt-in: also ask for the next NPC's opening line ahead of time
+prepare_opening_line = False
+
+def prefetch_replies(character, background, conversation_history, dialogue_system):
+    if not speculative_prefetch:
+        return
+    prefetcher.prefetch([
+        build_ai_prompt(character, background.name, conversation_history, option.text)
+        for option in dialogue_system.selected_dialogue_options
+    ], len(conversation_history) == 0)
+
+def change_resolution(new_width, new_height):
+    """Switch the window to a new resolution without restarting pygame"""
+    # Fonts, decoded images and text caches stay valid, only sized surfaces are redone
+    setup_display(new_width, new_height)
+
+def options_menu_layout(width, height):
+    entries = [(f"{w}x{h}", (w, h)) for w, h in SUPPORTED_RESOLUTIONS] + [("Back to Menu", "back")]
+    title = Label("Options Menu", font, WHITE, (width // 2, height // 4))
+    return logo_backdrop(160), [title], stacked_buttons(width, height, entries)
+
+options_menu_view = Menu("options_menu", options_menu_layout, font)
+
+def options_menu():
+    def on_click(choice):
+        if choice != "back":
+            change_resolution(*choice)
+        # Back to the main menu, at the new resolution if one was picked
+        return True
+
+    options_menu_view.run(on_click, quit_game)
+
+BUBBLE_PADDING = 15
+
+def fit_bubble_text(text, bubble_width, bubble_height, layout=None):
+    """Lines and font for text inside a bubble, shrunk or cut so they never spill out"""
+    max_text_width = bubble_width - BUBBLE_PADDING * 2
+    if layout is not None:
+        # Streaming text: only the tail line is re-wrapped while it still fits
+        lines = layout.update(text)
+        if len(lines) <= max_lines_for(layout.font, bubble_height, BUBBLE_PADDING):
+            return lines, layout.font
+    fitted = text_layout_cache.layout(text, FONT_SIZE, max_text_width, bubble_height, BUBBLE_PADDING)
+    return fitted.lines, fitted.font
+
+def speech_bubble_rect(center_x, bottom_y, bubble_width=500, bubble_height=150):
+    """Area draw_speech_bubble will touch; the text is fitted inside it"""
+    return pygame.Rect(center_x - bubble_width // 2, bottom_y - bubble_height, bubble_width, bubble_height)
+
+def draw_speech_bubble(text, color, surface, center_x, bottom_y, bubble_width=500, bubble_height=150, bubble_color=(255, 255, 255), border_color=(0, 0, 0), border_width=3, layout=None):
     # Bubble rectangle (rounded)
-    bubble_rect = pygame.Rect(center_x - bubble_width // 2, bottom_y - bubble_height, bubble_width, bubble_height)
+    bubble_rect = speech_bubble_rect(center_x, bottom_y, bubble_width, bubble_height)
 
     # Draw bubble background with border
     pygame.draw.rect(surface, border_color, bubble_rect, border_radius=20)   # border
     pygame.draw.rect(surface, bubble_color, bubble_rect.inflate(-border_width*2, -border_width*2), border_radius=20)  # inner bubble
 
-    # Draw the tail as a triangle pointing downwards (you can adjust position)
-    wrapped_lines = []
-    words = text.split(' ')
-    line = ""
-    padding = 15
-    max_text_width = bubble_width - padding * 2
-    for word in words:
-        test_line = line + word + " "
-        if font.size(test_line)[0] > max_text_width:
-            wrapped_lines.append(line)
-            line = word + " "
-        else:
-            line = test_line
-    wrapped_lines.append(line)
+    wrapped_lines, line_font = fit_bubble_text(text, bubble_width, bubble_height, layout)
 
     # Draw each line centered inside the bubble with padding
     for i, line in enumerate(wrapped_lines):
-        line_surf = font.render(line.strip(), True, color)
-        line_rect = line_surf.get_rect(center=(center_x, bubble_rect.top + padding + i * font.get_linesize()))
+        line_surf = text_layout_cache.line_surface(line_font, line.strip(), color)
+        line_rect = line_surf.get_rect(center=(center_x, bubble_rect.top + BUBBLE_PADDING + i * line_font.get_linesize()))
         surface.blit(line_surf, line_rect)
 
-def draw_dialogue_box(text, font, color, surface, center_x, bottom_y, box_width=500, box_height=80, box_color=(0,0,0)):
+def draw_dialogue_box(text, font_size, color, surface, center_x, bottom_y, box_width=500, box_height=80, box_color=(0,0,0)):
     # Draw the box
     box_rect = pygame.Rect(center_x - box_width // 2, bottom_y - box_height, box_width, box_height)
     pygame.draw.rect(surface, box_color, box_rect, border_radius=12)
     # Fit text inside the box
-    wrapped_lines = []
-    words = text.split(' ')
-    line = ""
-    for word in words:
-        test_line = line + word + " "
-        if font.size(test_line)[0] > box_width - 20:
-            wrapped_lines.append(line)
-            line = word + " "
-        else:
-            line = test_line
-    wrapped_lines.append(line)
+    fitted = text_layout_cache.layout(text, font_size, box_width - 20, box_height, 20)
     # Draw each line centered
-    for i, line in enumerate(wrapped_lines):
-        line_surf = font.render(line.strip(), True, color)
-        line_rect = line_surf.get_rect(center=(center_x, box_rect.top + 20 + i * font.get_height()))
+    for i, line in enumerate(fitted.lines):
+        line_surf = text_layout_cache.line_surface(fitted.font, line.strip(), color)
+        line_rect = line_surf.get_rect(center=(center_x, box_rect.top + 20 + i * fitted.font.get_height()))
         surface.blit(line_surf, line_rect)
 
 def load_backgrounds_from_csv(csv_path):
@@ -361,168 +464,241 @@ ALL_BACKGROUNDS = load_backgrounds_from_csv("../assets/characteristics/city_loca
 def choose_next_location():
     # Pick 4 random backgrounds
     options = random.sample(ALL_BACKGROUNDS, 4)
-    while True:
-        screen.fill(WHITE)
-        draw_text("Choose your next location:", font, BLACK, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4)
-        buttons = []
-        for i, bg in enumerate(options):
-            btn_rect = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2 + i * 70, 300, 50)
-            pygame.draw.rect(screen, BLACK, btn_rect)
-            draw_text(bg["display"], font, WHITE, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + i * 70 + 25)
-            buttons.append((btn_rect, bg["name"]))
-        pygame.display.update()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mx, my = pygame.mouse.get_pos()
-                for btn_rect, bg_name in buttons:
-                    if btn_rect.collidepoint((mx, my)):
-                        return bg_name
+
+    def layout(width, height):
+        title = Label("Choose your next location:", font, BLACK, (width // 2, height // 4))
+        buttons = [Button((width // 2 - 150, height // 2 + i * 70, 300, 50), bg["display"], bg["name"], FLAT)
+                   for i, bg in enumerate(options)]
+        return (lambda surface: surface.fill(WHITE)), [title], buttons
+
+    return Menu("choose_next_location", layout, font).run(lambda bg_name: bg_name, quit_game)
+
+def draw_scene(character, background, surface=None):
+    """Draw the background and character using the pre-scaled surface cache"""
+    if surface is None:
+        surface = screen
+    scaled_background = scaled_cache.get(
+        ("background", background.name), None,
+        (SCREEN_WIDTH, SCREEN_HEIGHT), background.image)
+    surface.blit(scaled_background, (0, 0))
+
+    # Integer math keeps this identical to the sizes baked into asset packs
+    new_char_width, new_char_height = character_size(character.current_sprite.get_size(), SCREEN_HEIGHT)
+    scaled_character = scaled_cache.get(
+        ("character", character.character_name), character.expression,
+        (new_char_width, new_char_height), character.current_sprite,
+        smooth=True, alpha=True)
+    offset_x = 250
+    offset_y = 100
+    surface.blit(scaled_character, (SCREEN_WIDTH // 2 - new_char_width // 2 + offset_x, SCREEN_HEIGHT // 4 - offset_y))
+
+def build_dialogue_scene(scene, character, background, dialogue_system, bubble_text, layout=None, prompt_text=None):
+    """Declare this frame's dialogue widgets; only the ones that changed get redrawn"""
+    static_key = (background.name, character.character_name, character.expression, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    scene.set_static(static_key, lambda surface: draw_scene(character, background, surface))
+
+    options = dialogue_system.selected_dialogue_options
+    scene.add("options", tuple(option.text for option in options),
+              dialogue_system.layout_dialogue_options(),
+              lambda surface: dialogue_system.draw_dialogue_options(surface, font))
+
+    # Draw the character's response above the character
+    if bubble_text:
+        bubble_args = (SCREEN_WIDTH // 2 - 90, SCREEN_HEIGHT // 4 + 30)
+        scene.add("response", bubble_text,
+                  speech_bubble_rect(*bubble_args, bubble_width=500, bubble_height=200),
+                  lambda surface: draw_speech_bubble(
+                      bubble_text,
+                      (0, 0, 0),
+                      surface,
+                      *bubble_args,
+                      bubble_width=500,
+                      bubble_height=200,
+                      bubble_color=(255, 255, 255),
+                      border_color=(0, 0, 0),
+                      border_width=3,
+                      layout=layout))
+
+    if prompt_text:
+        prompt_args = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        scene.add("prompt", prompt_text,
+                  speech_bubble_rect(*prompt_args, bubble_width=500, bubble_height=200),
+                  lambda surface: draw_speech_bubble(
+                      prompt_text,
+                      (0, 0, 0),
+                      surface,
+                      *prompt_args,
+                      bubble_width=500,
+                      bubble_height=200,
+                      bubble_color=(255, 255, 255),
+                      border_color=(0, 0, 0),
+                      border_width=3))
+
+    # Profiler overlay, last so it sits on top of everything
+    overlay_state = debug_overlay.state()
+    if overlay_state is not None:
+        scene.add("debug_overlay", overlay_state, debug_overlay.rect(), debug_overlay.draw)
 
 def game_loop():
-    current_idx = random.randint(0, len(PREDEFINED_CHARACTERS) - 1)
-    char_info = PREDEFINED_CHARACTERS[current_idx]
-    character = Character(char_info["name"], char_info["character_name"], char_info["char_type"], char_info["traits"])
-    background = Background(random.choice(char_info["backgrounds"]))
-    dialogue_system = DialogueSystem(SCREEN_WIDTH, SCREEN_HEIGHT)
+    character, background, encounter = encounter_preparer.take(with_opening=prepare_opening_line)
+    current_idx = encounter.index
+    dialogue_system = DialogueSystem(SCREEN_WIDTH, SCREEN_HEIGHT, character)
     last_response = ""
     conversations = 0
-    conversation_history = []
+    conversation_history = new_conversation()
+    # Wrapping state for the NPC bubble, text is 500px wide minus the padding
+    response_layout = IncrementalWrapper(font_pool.get(FONT_SIZE), 500 - BUBBLE_PADDING * 2)
+    prefetch_replies(character, background, conversation_history, dialogue_system)
+    scene = DialogueScene(screen)
 
     while True:
-        screen.fill(BLACK)
-        scaled_background = pygame.transform.scale(background.image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-        screen.blit(scaled_background, (0, 0))
-
-        char_width, char_height = character.current_sprite.get_size()
-        aspect_ratio = char_width / char_height
-        new_char_height = SCREEN_HEIGHT - 50
-        new_char_width = int(new_char_height * aspect_ratio)
-        scaled_character = pygame.transform.smoothscale(character.current_sprite, (new_char_width, new_char_height))
-        offset_x = 250
-        offset_y = 100
-        screen.blit(scaled_character, (SCREEN_WIDTH // 2 - new_char_width // 2 + offset_x, SCREEN_HEIGHT // 4 - offset_y))
-
-        dialogue_system.draw_dialogue_options(screen, font)
-
-        # Draw the character's response above the character
-        if last_response:
-            char_box_center_x = SCREEN_WIDTH // 2
-            char_box_bottom_y = SCREEN_HEIGHT // 4
-            draw_speech_bubble(
-                last_response,
-                font,
-                (0, 0, 0),
-                screen,
-                char_box_center_x - 90,
-                char_box_bottom_y + 30,
-                bubble_width=500,
-                bubble_height=200,
-                bubble_color=(255, 255, 255),
-                border_color=(0, 0, 0),
-                border_width=3)
-
-        pygame.display.update()
-
-        for event in pygame.event.get():
+        # The opening line is shown if it lands before the player speaks
+        if encounter is not None and not encounter.waiting():
+            opening_line = encounter.opening_line()
+            encounter = None
+            if opening_line and not conversations and not npc_worker.busy:
+                last_response = opening_line
+                conversation_history.append("", opening_line)
+                prefetch_replies(character, background, conversation_history, dialogue_system)
+
+        # Show a thinking indicator while a request is in flight
+        bubble_text = last_response
+        if npc_worker.busy and not last_response:
+            bubble_text = "." * (1 + pygame.time.get_ticks() // 400 % 3)
+        build_dialogue_scene(scene, character, background, dialogue_system, bubble_text, layout=response_layout)
+        dirty_rects = scene.render()
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+
+        # Keep drawing at full rate while the thinking indicator animates
+        for event in loop_driver("game_loop").events(animating=npc_worker.busy):
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_game()
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
+                    npc_worker.cancel()
+                    prefetcher.discard()
+                    encounter_preparer.discard()
+                    conversation_history.close()
                     return
             if event.type == pygame.MOUSEBUTTONDOWN:
-                if conversations < 5:
+                # Clicks are ignored while the NPC is still answering
+                if conversations < EXCHANGES_PER_ENCOUNTER and not npc_worker.busy:
                     selected_option = dialogue_system.handle_click(event.pos)
                     if selected_option:
+                        if encounter is not None:
+                            # Too late for the opening line
+                            encounter.cancel()
+                            encounter = None
                         player_message = selected_option.text
-                        print(f"Player selected: {player_message}")
+                        log.debug("Player selected: %s", player_message)
                         # Build AI prompt
                         background_name = background.name
-                        ai_prompt = build_ai_prompt(character, background_name, conversation_history, player_message)
-                        print(f"AI Prompt: {ai_prompt}")
-                        # Get AI response
-                        npc_response = get_npc_response(client, model_name, ai_prompt)
-                        # Save to history
-                        conversation_history.append({"player": player_message, "npc": npc_response})
-                        # Update visuals
-                        reaction = character.react_to_dialogue(selected_option)
-                        character.set_sprite_by_reaction(reaction)
-                        last_response = npc_response
-                        dialogue_system.selected_dialogue_options = dialogue_system.select_random_dialogue_options()
-                        conversations += 1
-
-        # If 5 conversations reached, show prompt and wait for SPACE
-        if conversations >= 5:
+                        with metrics.timer("prompt_build_ms"):
+                            ai_prompt = build_ai_prompt(character, background_name, conversation_history, player_message)
+                        metrics.observe("prompt_chars", len(ai_prompt), buckets=SIZE_BUCKETS)
+                        log.debug("AI Prompt: %s", ai_prompt)
+                        conversation_history.record_prompt(ai_prompt)
+                        first_turn = len(conversation_history) == 0
+                        # Get AI response in the background
+                        last_response = ""
+                        prefetched = prefetcher.take(ai_prompt) if speculative_prefetch else None
+                        if prefetched is not None:
+                            # Usually already finished, otherwise wait on the in-flight request
+                            npc_worker.submit(lambda future=prefetched: future.result()[0], option=selected_option)
+                        elif stream_responses:
+                            npc_worker.submit(stream_npc_response, backend, ai_prompt, first_turn,
+                                              stream=True, option=selected_option)
+                        else:
+                            npc_worker.submit(get_npc_response, backend, ai_prompt, first_turn, option=selected_option)
+            if event.type == NPC_CHUNK_EVENT:
+                if npc_worker.is_current(event):
+                    last_response += event.text
+            if event.type == NPC_RESPONSE_EVENT:
+                if not npc_worker.complete(event):
+                    continue
+                selected_option = event.option
+                reaction = character.react_to_dialogue(selected_option)
+                npc_response = event.text
+                if event.error is not None:
+                    log.warning("AI request failed: %s", event.error)
+                    metrics.count("llm_errors")
+                    npc_response = character.get_response_by_reaction(reaction)
+                # Save to history
+                conversation_history.append(selected_option.text, npc_response)
+                # Update visuals
+                character.set_sprite_by_reaction(reaction)
+                last_response = npc_response
+                dialogue_system.selected_dialogue_options = dialogue_system.select_random_dialogue_options()
+                conversations += 1
+                if conversations < EXCHANGES_PER_ENCOUNTER:
+                    prefetch_replies(character, background, conversation_history, dialogue_system)
+                else:
+                    # Load the next encounter while the player reads and picks a location
+                    encounter_preparer.prepare(current_idx, with_opening=prepare_opening_line)
+
+        # Once every exchange is used up, show prompt and wait for SPACE
+        if conversations >= EXCHANGES_PER_ENCOUNTER:
             waiting_for_space = True
             while waiting_for_space:
-                # Draw everything as usual
-                screen.fill(BLACK)
-                scaled_background = pygame.transform.scale(background.image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-                screen.blit(scaled_background, (0, 0))
-                char_width, char_height = character.current_sprite.get_size()
-                aspect_ratio = char_width / char_height
-                new_char_height = SCREEN_HEIGHT - 50
-                new_char_width = int(new_char_height * aspect_ratio)
-                scaled_character = pygame.transform.smoothscale(character.current_sprite, (new_char_width, new_char_height))
-                offset_x = 250
-                offset_y = 100
-                screen.blit(scaled_character, (SCREEN_WIDTH // 2 - new_char_width // 2 + offset_x, SCREEN_HEIGHT // 4 - offset_y))
-
-                dialogue_system.draw_dialogue_options(screen, font)
-                if last_response:
-                    char_box_center_x = SCREEN_WIDTH // 2
-                    char_box_bottom_y = SCREEN_HEIGHT // 4
-                    draw_speech_bubble(
-                        last_response,
-                        font,
-                        (0, 0, 0),
-                        screen,
-                        char_box_center_x - 90,
-                        char_box_bottom_y + 30,
-                        bubble_width=500,
-                        bubble_height=200,
-                        bubble_color=(255, 255, 255),
-                        border_color=(0, 0, 0),
-                        border_width=3)
-                draw_speech_bubble(
-                    "Press SPACE to choose your next location!",
-                    font,
-                    (0, 0, 0),
-                    screen,
-                    SCREEN_WIDTH // 2,
-                    SCREEN_HEIGHT // 2,
-                    bubble_width=500,
-                    bubble_height=200,
-                    bubble_color=(255, 255, 255),
-                    border_color=(0, 0, 0),
-                    border_width=3)
-
-                pygame.display.update()
-                for event in pygame.event.get():
+                # Draw everything as usual, plus the prompt bubble
+                build_dialogue_scene(scene, character, background, dialogue_system, last_response,
+                                     layout=response_layout,
+                                     prompt_text="Press SPACE to choose your next location!")
+                dirty_rects = scene.render()
+                if dirty_rects:
+                    pygame.display.update(dirty_rects)
+                for event in loop_driver("waiting_for_space").events():
                     if event.type == pygame.QUIT:
-                        pygame.quit()
-                        sys.exit()
+                        quit_game()
                     if event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_ESCAPE:
+                            encounter_preparer.discard()
+                            conversation_history.close()
                             return
                         if event.key == pygame.K_SPACE:
                             waiting_for_space = False
 
             # 2. Let player choose next location
-            next_bg_name = choose_next_location()
-            background = Background(next_bg_name)
+            # (as before, the next character's own backgrounds decide the scene)
+            choose_next_location()
 
-            # After exiting the loop, fade and switch character
+            # After exiting the loop, fade and switch to the prepared character
             fade_to_black(screen)
-            character, background, current_idx = pick_new_character(exclude_index=current_idx)
-            dialogue_system.selected_dialogue_options = dialogue_system.select_random_dialogue_options()
+            character, background, encounter = encounter_preparer.take(current_idx, prepare_opening_line)
+            current_idx = encounter.index
+            dialogue_system.start_encounter(character)
             last_response = ""
             conversations = 0
-            conversation_history = []
+            conversation_history.close()
+            conversation_history = new_conversation()
+            prefetch_replies(character, background, conversation_history, dialogue_system)
+            # The location menu and fade drew over the screen
+            scene.invalidate()
+            build_dialogue_scene(scene, character, background, dialogue_system, last_response,
+                                 layout=response_layout)
+            scene.render()
+            fade_from_black(screen)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI-powered visual novel")
+    parser.add_argument("--backend", choices=["gemini", "mock", "http"], default="gemini",
+                        help="mock runs fully offline, http talks to standin_server.py")
+    parser.add_argument("--backend-url", help="stand-in server URL for --backend http")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="model used for every turn with --no-routing")
+    parser.add_argument("--response-cache-read-only", action="store_true",
+                        help="serve cached replies but never write the cache file (kiosks)")
+    parser.add_argument("--no-routing", action="store_true", help="don't route ordinary turns to a faster model")
+    parser.add_argument("--log-level", default="INFO", help="DEBUG also logs prompts and clicks")
+    parser.add_argument("--metrics-out", help="write metrics here on exit (.prom or JSON lines)")
+    args = parser.parse_args()
+    set_level(args.log_level)
+    METRICS_EXPORT_PATH = args.metrics_out
+    model_router.enabled = not args.no_routing
+    RESPONSE_CACHE_READ_ONLY = args.response_cache_read_only
+
+    setup_backend(args.backend, url=args.backend_url, model_name=args.model)
+    setup_response_cache()
+    setup_display(SCREEN_WIDTH, SCREEN_HEIGHT)
     main_menu()
 
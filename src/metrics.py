@@ -0,0 +1,189 @@
+"""In-process performance metrics.
+
+    metrics.observe("llm_total_ms", 812.0, backend="gemini")
+    with metrics.timer("prompt_build_ms"):
+        ...
+    metrics.count("llm_requests", source="cache")
+
+Observations go into fixed-bucket histograms (Prometheus style), keyed by
+name and labels, so recording is O(buckets) with no per-sample storage.
+Caches that keep their own hit/miss counters are registered with
+add_source() and read only when a report is built. export() writes
+everything as JSON lines or Prometheus text.
+"""
+import bisect
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Milliseconds, from sub-frame work up to slow LLM replies
+TIME_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# Characters, for prompt sizes
+SIZE_BUCKETS = (128, 256, 512, 1024, 1500, 2048, 4096, 8192, 16384)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate by interpolating inside the bucket that holds the q-th sample."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= target and bucket_count:
+                low = self.buckets[i - 1] if i else self.min
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                low, high = max(low, self.min), min(high, self.max)
+                return low + (high - low) * (target - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.sources = {}
+
+    def observe(self, name, value, buckets=TIME_BUCKETS_MS, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def count(self, name, n=1, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000, **labels)
+
+    def add_source(self, name, stats):
+        """stats() -> dict with "hits" and "misses" (and anything else numeric)."""
+        self.sources[name] = stats
+
+    def histogram(self, name, **labels):
+        return self.histograms.get((name, label_key(labels)))
+
+    def hit_rates(self):
+        rates = {}
+        for name, stats in self.sources.items():
+            data = stats()
+            total = data.get("hits", 0) + data.get("misses", 0)
+            rates[name] = data.get("hits", 0) / total if total else None
+        return rates
+
+    def snapshot(self):
+        with self.lock:
+            histograms = [(name, dict(labels), h.summary()) for (name, labels), h in self.histograms.items()]
+            counters = [(name, dict(labels), value) for (name, labels), value in self.counters.items()]
+        sources = {name: stats() for name, stats in self.sources.items()}
+        return histograms, counters, sources
+
+    def to_jsonl(self):
+        histograms, counters, sources = self.snapshot()
+        now = time.time()
+        lines = []
+        for name, labels, summary in histograms:
+            lines.append({"time": now, "type": "histogram", "name": name, "labels": labels, **summary})
+        for name, labels, value in counters:
+            lines.append({"time": now, "type": "counter", "name": name, "labels": labels, "value": value})
+        for name, data in sources.items():
+            lines.append({"time": now, "type": "cache", "name": name, **data})
+        return "".join(json.dumps(line) + "\n" for line in lines)
+
+    def to_prometheus(self, prefix="vn_"):
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        for (name, labels), h in histograms:
+            declare(prefix + name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                cumulative += bucket_count
+                lines.append(f"{prefix}{name}_bucket{format_labels(labels, ('le', bound))} {cumulative}")
+            lines.append(f"{prefix}{name}_sum{format_labels(labels)} {h.sum}")
+            lines.append(f"{prefix}{name}_count{format_labels(labels)} {h.count}")
+        for (name, labels), value in counters:
+            declare(f"{prefix}{name}_total", "counter")
+            lines.append(f"{prefix}{name}_total{format_labels(labels)} {value}")
+        # Group by field, each metric's samples have to be contiguous
+        fields = {}
+        for name, stats in sorted(self.sources.items()):
+            for field, value in stats().items():
+                if isinstance(value, (int, float)):
+                    fields.setdefault(field, []).append((name, value))
+        for field, samples in fields.items():
+            declare(f"{prefix}cache_{field}", "gauge")
+            for name, value in samples:
+                lines.append(f'{prefix}cache_{field}{{cache="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Append JSON lines, or write Prometheus text when path ends in .prom."""
+        if path.endswith(".prom"):
+            with open(path, "w") as f:
+                f.write(self.to_prometheus())
+        else:
+            with open(path, "a") as f:
+                f.write(self.to_jsonl())
+
+
+metrics = Metrics()
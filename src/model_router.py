@@ -0,0 +1,115 @@
+"""Pick the model for each NPC reply.
+
+Replies are one or two short sentences, so ordinary turns go to the first
+(fastest) tier. A turn starts on the last (full) tier when it opens an
+encounter or its prompt is long, and a reply that fails check() is asked
+again one tier up. All tiers tried for a turn share one deadline, so a
+turn never takes longer than turn_deadline_s; when too little of it is
+left for the next tier, the reply at hand is used instead. A streamed
+turn only shows the player the reply that is used. Every turn records
+which tier served it and how long that took (llm_tier_ms, llm_routes,
+llm_escalations).
+"""
+import collections
+import statistics
+import time
+
+from log import log
+from metrics import metrics
+
+
+class ModelRouter:
+    def __init__(self, tiers, long_prompt_chars=1500, escalate_first_turn=True, max_reply_chars=300,
+                 turn_deadline_s=8.0, min_escalation_s=1.0, enabled=True):
+        # [(tier name, model name)], fastest first
+        self.tiers = list(tiers)
+        self.long_prompt_chars = long_prompt_chars
+        self.escalate_first_turn = escalate_first_turn
+        self.max_reply_chars = max_reply_chars
+        self.turn_deadline_s = turn_deadline_s
+        # Budget an escalation needs at least, before any latency has been seen
+        self.min_escalation_s = min_escalation_s
+        self.enabled = enabled
+        # Recent reply latencies (s) per tier
+        self.latencies = collections.defaultdict(lambda: collections.deque(maxlen=50))
+
+    def route(self, prompt, first_turn=False):
+        """Return (tier index, reason) for a new turn."""
+        if first_turn and self.escalate_first_turn:
+            return len(self.tiers) - 1, "first_turn"
+        if len(prompt) > self.long_prompt_chars:
+            return len(self.tiers) - 1, "long_prompt"
+        return 0, "default"
+
+    def check(self, text):
+        """Return why a reply is unusable, or None if it is fine."""
+        text = text.strip()
+        if not text:
+            return "empty"
+        if len(text) > self.max_reply_chars:
+            return "too_long"
+        # The prompt asks for plain words: no emojis and no *blushes* stage directions
+        if "*" in text or any(ord(c) >= 0x2600 for c in text):
+            return "style"
+        return None
+
+    def fastest(self):
+        """Model for background work such as summaries (None: the backend's default)."""
+        return self.tiers[0][1] if self.enabled and self.tiers else None
+
+    def expected_s(self, tier):
+        """How long a reply from tier is likely to take."""
+        recent = self.latencies[tier]
+        return max(self.min_escalation_s, statistics.median(recent) if recent else 0.0)
+
+    def reply(self, fetch, prompt, first_turn=False, on_chunk=None):
+        """fetch(prompt, model, deadline) -> (text, tokens); returns the reply that passed the check.
+
+        deadline is a time.monotonic() value shared by every tier tried for
+        this turn. Tokens are summed over every tier that was tried.
+
+        With on_chunk, fetch gets a fourth argument to stream chunks to. The
+        last tier's reply is used whatever check() says, so it streams
+        straight through; an earlier tier's chunks are held back until its
+        reply is accepted, so a reply that gets escalated is never shown.
+        """
+        deadline = time.monotonic() + self.turn_deadline_s
+        if not self.enabled or not self.tiers:
+            if on_chunk is None:
+                return fetch(prompt, None, deadline)
+            return fetch(prompt, None, deadline, on_chunk)
+        index, reason = self.route(prompt, first_turn)
+        spent = 0
+        while True:
+            tier, model = self.tiers[index]
+            last = index == len(self.tiers) - 1
+            held = []
+            started = time.perf_counter()
+            if on_chunk is None:
+                text, tokens = fetch(prompt, model, deadline)
+            else:
+                text, tokens = fetch(prompt, model, deadline, on_chunk if last else held.append)
+            spent += tokens
+            elapsed = time.perf_counter() - started
+            self.latencies[tier].append(elapsed)
+            metrics.observe("llm_tier_ms", elapsed * 1000, tier=tier)
+            metrics.count("llm_routes", tier=tier, reason=reason)
+            problem = self.check(text)
+            if problem is None or last:
+                if problem is not None:
+                    log.info("Reply from %s failed the %s check, using it anyway", model, problem)
+                return self._accept(text, spent, held, on_chunk)
+            next_tier = self.tiers[index + 1][0]
+            if deadline - time.monotonic() < self.expected_s(next_tier):
+                log.info("Reply from %s failed the %s check, no time left to escalate", model, problem)
+                metrics.count("llm_escalations_skipped", reason=problem)
+                return self._accept(text, spent, held, on_chunk)
+            log.debug("Reply from %s failed the %s check, escalating", model, problem)
+            metrics.count("llm_escalations", reason=problem)
+            index += 1
+            reason = problem
+
+    def _accept(self, text, spent, held, on_chunk):
+        if held:
+            on_chunk("".join(held))
+        return text, spent
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+# Posted to the pygame event queue when a background NPC request finishes
+NPC_RESPONSE_EVENT = pygame.event.custom_type()
+# Posted for each partial chunk of a streaming request
+NPC_CHUNK_EVENT = pygame.event.custom_type()
+
+
+class NpcResponseWorker:
+    """Runs NPC requests on a worker thread and hands results back as pygame events.
+
+    Only one request is tracked as pending at a time. A request that is
+    cancelled or superseded before it starts is dropped; one that is already
+    running is delivered but flagged as stale. With two workers a stale
+    request still running can't hold up the next one.
+    """
+
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="npc")
+        self.pending_id = None
+        self.pending_future = None
+        self.next_id = 0
+
+    @property
+    def busy(self):
+        return self.pending_id is not None
+
+    def submit(self, fn, *args, stream=False, **payload):
+        """Run fn(*args) in the background.
+
+        With stream=True, fn also receives an on_chunk callback whose
+        arguments are forwarded as NPC_CHUNK_EVENTs.
+        """
+        self.cancel()
+        self.next_id += 1
+        request_id = self.next_id
+        self.pending_id = request_id
+        if stream:
+            args = args + (lambda chunk: self._post_chunk(request_id, chunk),)
+        future = self.pending_future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self._deliver(request_id, f, payload))
+        return request_id
+
+    def _post_chunk(self, request_id, chunk):
+        # The game may have quit while the request was still running
+        if not pygame.get_init():
+            return
+        pygame.event.post(pygame.event.Event(NPC_CHUNK_EVENT, request_id=request_id, text=chunk))
+
+    def _deliver(self, request_id, future, payload):
+        if future.cancelled():
+            return
+        try:
+            text, error = future.result(), None
+        except Exception as e:
+            text, error = None, e
+        if not pygame.get_init():
+            return
+        pygame.event.post(pygame.event.Event(
+            NPC_RESPONSE_EVENT, request_id=request_id, text=text, error=error, **payload))
+
+    def is_current(self, event):
+        return event.request_id == self.pending_id
+
+    def complete(self, event):
+        """Mark the event's request as finished. Returns False for stale results."""
+        if event.request_id != self.pending_id:
+            return False
+        self.pending_id = None
+        return True
+
+    def cancel(self):
+        if self.pending_future is not None:
+            # Only takes effect if the request hasn't started yet
+            self.pending_future.cancel()
+            self.pending_future = None
+        self.pending_id = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,98 @@
+"""Draws the dialogue options shown each turn.
+
+Options are picked by random index instead of shuffling the pool, so a draw
+costs O(k) however many lines there are, and the shared option list is
+never reordered. Options shown recently in the encounter are skipped.
+
+With mix=True the draw includes at least one option the character likes
+and one they dislike (when the pool has any). The pool is split by
+reaction once per distinct set of trait masks and the split is reused after.
+"""
+import random
+from collections import deque
+
+
+class OptionSampler:
+    def __init__(self, pool, recent=16, rng=None):
+        self.pool = pool
+        self.recent = deque(maxlen=recent)
+        self.recent_ids = {}
+        self.rng = rng or random
+        # trait masks -> (liked indices, disliked indices)
+        self.buckets = {}
+
+    def reset(self):
+        """Forget what was shown, e.g. when a new encounter starts."""
+        self.recent.clear()
+        self.recent_ids.clear()
+
+    def remember(self, options):
+        for option in options:
+            if len(self.recent) == self.recent.maxlen:
+                self._forget(self.recent[0])
+            self.recent.append(option)
+            self.recent_ids[id(option)] = self.recent_ids.get(id(option), 0) + 1
+
+    def _forget(self, option):
+        count = self.recent_ids[id(option)] - 1
+        if count:
+            self.recent_ids[id(option)] = count
+        else:
+            del self.recent_ids[id(option)]
+
+    def reaction_buckets(self, character):
+        buckets = self.buckets.get(character.trait_masks)
+        if buckets is None:
+            liked, disliked = [], []
+            for i, option in enumerate(self.pool):
+                reaction = character.react_to_dialogue(option)
+                if reaction > 0:
+                    liked.append(i)
+                elif reaction < 0:
+                    disliked.append(i)
+            buckets = self.buckets[character.trait_masks] = (liked, disliked)
+        return buckets
+
+    def _draw(self, indices, chosen, avoid_recent, attempts=32):
+        """One random pool index from indices that isn't chosen yet, or None."""
+        if not indices:
+            return None
+        for _ in range(attempts):
+            i = indices[self.rng.randrange(len(indices))]
+            if i in chosen:
+                continue
+            if avoid_recent and id(self.pool[i]) in self.recent_ids:
+                continue
+            return i
+        # Mostly exhausted (small pool): fall back to a scan from a random start
+        start = self.rng.randrange(len(indices))
+        for offset in range(len(indices)):
+            i = indices[(start + offset) % len(indices)]
+            if i not in chosen and not (avoid_recent and id(self.pool[i]) in self.recent_ids):
+                return i
+        return None
+
+    def sample(self, k, character=None, mix=False):
+        """k distinct options, avoiding recently shown ones while the pool allows."""
+        k = min(k, len(self.pool))
+        everything = range(len(self.pool))
+        chosen = []
+        if mix and character is not None:
+            for bucket in self.reaction_buckets(character):
+                if len(chosen) < k:
+                    i = self._draw(bucket, chosen, True)
+                    if i is None:
+                        i = self._draw(bucket, chosen, False)
+                    if i is not None:
+                        chosen.append(i)
+        for avoid_recent in (True, False):
+            while len(chosen) < k:
+                i = self._draw(everything, chosen, avoid_recent)
+                if i is None:
+                    break
+                chosen.append(i)
+        # The liked/disliked picks shouldn't always sit in the same slots
+        self.rng.shuffle(chosen)
+        options = [self.pool[i] for i in chosen]
+        self.remember(options)
+        return options
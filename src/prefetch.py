@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SpeculativePrefetcher:
+    """Requests NPC replies for every visible option before the player picks one.
+
+    fetch(prompt, *args) must return (text, tokens_used). Prefetches are keyed by the
+    exact prompt, so a click only hits if build_ai_prompt produces the same
+    string the prefetch was started with. A pick whose prefetch is still
+    queued behind the other options is a miss: take() cancels it so the
+    caller can send the request straight away instead of waiting its turn.
+    """
+
+    def __init__(self, fetch, max_concurrent=2):
+        self.fetch = fetch
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="prefetch")
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.ready_hits = 0
+        self.misses = 0
+        self.queued = 0
+        self.wasted_requests = 0
+        self.wasted_tokens = 0
+
+    def prefetch(self, prompts, *args):
+        # Anything still queued from the previous turn can't be used any more
+        self.discard()
+        for prompt in prompts:
+            if prompt not in self.futures:
+                self.futures[prompt] = self.executor.submit(self.fetch, prompt, *args)
+
+    def take(self, prompt):
+        """Return the future for prompt (or None) and drop all the other prefetches."""
+        future = self.futures.pop(prompt, None)
+        self.discard()
+        if future is not None and future.cancel():
+            # Never started, asking directly beats waiting behind the losing options
+            self.queued += 1
+            future = None
+        if future is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if future.done():
+            self.ready_hits += 1
+        return future
+
+    def discard(self):
+        for future in self.futures.values():
+            # Requests that already started still cost tokens, count them once they land
+            if not future.cancel():
+                future.add_done_callback(self._count_waste)
+        self.futures.clear()
+
+    def _count_waste(self, future):
+        try:
+            _, tokens = future.result()
+        except Exception:
+            tokens = 0
+        with self.lock:
+            self.wasted_requests += 1
+            self.wasted_tokens += tokens
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "ready_hits": self.ready_hits,
+                "misses": self.misses,
+                "queued": self.queued,
+                "wasted_requests": self.wasted_requests,
+                "wasted_tokens": self.wasted_tokens,
+            }
+
+    def shutdown(self):
+        self.discard()
+        self.executor.shutdown(wait=False, cancel_futures=True)
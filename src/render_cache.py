@@ -0,0 +1,154 @@
+import threading
+from collections import OrderedDict
+
+import pygame
+
+
+class ScaledSurfaceCache:
+    """Keeps pre-scaled, display-converted copies of backgrounds and sprites.
+
+    Entries are keyed by (asset, expression, target size) so each image is
+    scaled once per resolution instead of once per frame. After a
+    resolution change, prewarm() rescales the previous entries on a
+    background thread; get() converts them to the display format on first
+    use, as AssetManager does.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+        self.staged = {}
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.resolution = None
+        self.hits = 0
+        self.misses = 0
+
+    def set_resolution(self, width, height):
+        # A new resolution makes every cached surface the wrong size
+        if self.resolution != (width, height):
+            self.invalidate()
+            self.resolution = (width, height)
+
+    def invalidate(self):
+        with self.lock:
+            # Stops any prewarm still working for the old resolution
+            self.generation += 1
+            self.surfaces.clear()
+            self.staged.clear()
+
+    def entries(self):
+        """Distinct (asset, expression) pairs currently cached."""
+        return list(dict.fromkeys((asset, expression) for asset, expression, _ in self.surfaces))
+
+    def prewarm(self, jobs):
+        """Scale jobs of (asset, expression, load(), size_for(source), smooth) in the background."""
+        generation = self.generation
+
+        def run():
+            for asset, expression, load, size_for, smooth in jobs:
+                if self.generation != generation:
+                    return
+                try:
+                    source = load()
+                except (pygame.error, FileNotFoundError):
+                    continue
+                size = size_for(source)
+                if source.get_size() == size:
+                    continue
+                scale = pygame.transform.smoothscale if smooth else pygame.transform.scale
+                surface = scale(source, size)
+                with self.lock:
+                    if self.generation == generation:
+                        self.staged[(asset, expression, size)] = surface
+
+        thread = threading.Thread(target=run, name="scaled-cache-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, asset, expression, size, source, smooth=False, alpha=False):
+        key = (asset, expression, size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        with self.lock:
+            surface = self.staged.pop(key, None)
+        if surface is not None:
+            # Scaled by prewarm, only the display conversion is left
+            self.hits += 1
+        else:
+            self.misses += 1
+            if source.get_size() == size:
+                # Already the right size, e.g. prebaked in an asset pack
+                surface = source
+            elif smooth:
+                surface = pygame.transform.smoothscale(source, size)
+            else:
+                surface = pygame.transform.scale(source, size)
+        # Match the display pixel format so blits don't convert every frame
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        self.surfaces[key] = surface
+        return surface
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.surfaces)}
+
+
+class FontPool:
+    """Shares one SysFont per point size instead of building a new one per call."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.fonts = {}
+
+    def get(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.SysFont(self.name, size)
+            self.fonts[size] = font
+        return font
+
+    def clear(self):
+        self.fonts.clear()
+
+
+class FittedTextCache:
+    """LRU memo of (text, max_width, color, base size) -> (rendered surface, chosen size)."""
+
+    def __init__(self, font_pool, max_entries=256):
+        self.font_pool = font_pool
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, color, font_size, max_width=None, min_size=12):
+        key = (text, max_width, color, font_size)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        size = font_size
+        font = self.font_pool.get(size)
+        # Shrink the font until the text fits the available width
+        if max_width is not None:
+            while font.size(text)[0] > max_width and size > min_size:
+                size -= 1
+                font = self.font_pool.get(size)
+
+        entry = (font.render(text, True, color), size)
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
@@ -0,0 +1,250 @@
+"""Deadlines, retries, a circuit breaker and hedging around an LLM backend.
+
+ResilientBackend has the same generate/stream interface as the backends
+it wraps. Every call either returns within deadline_s (or by the
+deadline passed in, a time.monotonic() value, if that is sooner) or raises a
+BackendError, so the game can fall back to the character's canned
+reaction instead of waiting on the network. Each attempt runs on its own
+daemon thread; an attempt that is given up on keeps running in the
+background, but its result and any streamed chunks are discarded, and it
+never holds up the process on exit. shutdown() wakes every waiting call.
+"""
+import collections
+import math
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+from llm_backends import BackendError
+from log import log
+from metrics import metrics
+
+
+class DeadlineExceeded(BackendError):
+    pass
+
+
+class CircuitOpen(BackendError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failed calls and fails fast for cooldown_s.
+
+    After the cooldown one trial call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=3, cooldown_s=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown_s:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Return the state a call is let through in ("closed" or "half-open"), or None.
+
+        In half-open state only one trial call gets through.
+        """
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return state
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return state
+            return None
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self, trial=False):
+        with self.lock:
+            self.failures += 1
+            if trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or trial:
+                    log.warning("LLM circuit breaker open for %.0fs", self.cooldown_s)
+                self.opened_at = time.monotonic()
+            if trial:
+                self.trial_running = False
+
+
+class ResilientBackend:
+    def __init__(self, backend, deadline_s=8.0, max_retries=2, base_delay_s=0.25, max_delay_s=2.0,
+                 breaker=None, hedge=False, hedge_min_ms=300, hedge_quantile=0.95):
+        self.backend = backend
+        self.name = backend.name
+        self.model_name = backend.model_name
+        self.deadline_s = deadline_s
+        self.max_retries = max_retries
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_min_ms = hedge_min_ms
+        self.hedge_quantile = hedge_quantile
+        # Recent successful latencies (ms), for the hedge delay
+        self.latencies = collections.deque(maxlen=100)
+        # Resolved by shutdown(), callers wait on it alongside their attempts
+        self.closing = Future()
+
+    def hedge_delay(self):
+        """Seconds to wait before sending a duplicate request, or None to not hedge."""
+        if not self.hedge or len(self.latencies) < 10:
+            return None
+        ordered = sorted(self.latencies)
+        p = ordered[min(len(ordered) - 1, int(self.hedge_quantile * len(ordered)))]
+        return max(p, self.hedge_min_ms) / 1000.0
+
+    def backoff(self, attempt):
+        # Full jitter: anywhere between 0 and the exponential cap
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * (2 ** attempt)))
+
+    def generate(self, prompt, model=None, deadline=None):
+        return self._call(lambda on_chunk: self.backend.generate(prompt, model), None, deadline)
+
+    def stream(self, prompt, on_chunk, model=None, deadline=None):
+        return self._call(lambda chunk: self.backend.stream(prompt, chunk, model), on_chunk, deadline)
+
+    def _call(self, request, on_chunk, deadline=None):
+        started = time.monotonic()
+        deadline = min(deadline or math.inf, started + self.deadline_s)
+        attempt = 0
+        while True:
+            if self.closing.done():
+                raise BackendError("LLM backend is shut down")
+            state = self.breaker.allow()
+            if state is None:
+                metrics.count("llm_fallbacks", reason="circuit_open")
+                raise CircuitOpen("LLM circuit breaker is open")
+            trial = state == "half-open"
+            try:
+                result = self._attempt(request, on_chunk, deadline, started)
+            except DeadlineExceeded:
+                self.breaker.record_failure(trial)
+                metrics.count("llm_fallbacks", reason="deadline")
+                raise
+            except Exception as e:
+                if self.closing.done():
+                    raise
+                metrics.count("llm_failures", backend=self.name)
+                delay = self.backoff(attempt)
+                # Streamed text can't be taken back, so only retry before the first chunk.
+                # A failed half-open trial isn't retried either, it re-opens the circuit.
+                if (attempt >= self.max_retries or getattr(e, "chunks_sent", False)
+                        or trial or time.monotonic() + delay >= deadline):
+                    self.breaker.record_failure(trial)
+                    metrics.count("llm_fallbacks", reason="retries")
+                    raise
+                log.info("LLM attempt %d failed (%s), retrying in %.2fs", attempt + 1, e, delay)
+                metrics.count("llm_retries", backend=self.name)
+                wait([self.closing], timeout=delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _attempt(self, request, on_chunk, deadline, call_started):
+        """One logical attempt, possibly hedged with a second copy of the request."""
+        started = time.monotonic()
+        # Only the attempt that delivered the first chunk may keep streaming
+        owner = []
+        owner_lock = threading.Lock()
+        first_chunk = threading.Event()
+
+        def launch(tag):
+            def forward(chunk):
+                with owner_lock:
+                    if not owner:
+                        owner.append(tag)
+                        first_chunk.set()
+                    if owner[0] != tag:
+                        return
+                on_chunk(chunk)
+
+            def run():
+                try:
+                    return request(forward if on_chunk is not None else None)
+                except Exception as e:
+                    e.chunks_sent = bool(owner) and owner[0] == tag
+                    raise
+
+            future = Future()
+            future.tag = tag
+
+            def work():
+                future.set_running_or_notify_cancel()
+                try:
+                    future.set_result(run())
+                except Exception as e:
+                    future.set_exception(e)
+
+            threading.Thread(target=work, name="llm-attempt", daemon=True).start()
+            return future
+
+        pending = {launch(0)}
+        hedge_at = None
+        delay = self.hedge_delay()
+        if delay is not None:
+            hedge_at = started + delay
+
+        error = None
+        while pending:
+            if first_chunk.is_set():
+                # A reply is already streaming in, no point duplicating it
+                hedge_at = None
+            now = time.monotonic()
+            if now >= deadline:
+                with owner_lock:
+                    # Silence whatever is still running
+                    owner[:] = [None]
+                raise DeadlineExceeded(f"no reply within {deadline - call_started:.1f}s")
+            timeout = deadline - now
+            if hedge_at is not None:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+            done, pending = wait(pending | {self.closing}, timeout=timeout, return_when=FIRST_COMPLETED)
+            pending.discard(self.closing)
+            if self.closing.done():
+                with owner_lock:
+                    owner[:] = [None]
+                raise BackendError("LLM backend is shut down")
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # With a hedge still in flight, let it finish instead
+                    error = e
+                    continue
+                with owner_lock:
+                    if owner and owner[0] != future.tag:
+                        # Another copy is streaming this reply, keep waiting for it
+                        continue
+                    owner[:] = [future.tag]
+                latency_ms = (time.monotonic() - started) * 1000
+                self.latencies.append(latency_ms)
+                if future.tag:
+                    metrics.count("llm_hedge_wins", backend=self.name)
+                return result
+            if hedge_at is not None and time.monotonic() >= hedge_at and pending:
+                hedge_at = None
+                metrics.count("llm_hedges", backend=self.name)
+                pending.add(launch(1))
+        raise error
+
+    def shutdown(self):
+        if not self.closing.done():
+            self.closing.set_result(None)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from log import log
+
+
+class ResponseCache:
+    """Persistent SQLite cache of NPC replies keyed by a hash of (model, prompt).
+
+    Entries older than max_age seconds are ignored and purged, and once there
+    are more than max_entries the least recently used ones are evicted. Each
+    thread gets its own connection and the database runs in WAL mode, so the
+    game's worker threads and other processes can write at the same time.
+    With read_only=True the file is opened read-only and nothing is written,
+    which is what demo kiosks with a pre-warmed cache want.
+    """
+
+    def __init__(self, path, max_entries=5000, max_age=30 * 24 * 3600, read_only=False, evict_every=50):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.read_only = read_only
+        self.evict_every = evict_every
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        if not read_only:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connect()
+
+    def _connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            return conn
+        if self.read_only:
+            if not os.path.exists(self.path):
+                return None
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=5)
+        else:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            conn.commit()
+        self.local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model_name, prompt):
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, model_name, prompt):
+        conn = self._connect()
+        row = None
+        if conn is not None:
+            key = self.make_key(model_name, prompt)
+            try:
+                row = conn.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and time.time() - row[1] > self.max_age:
+                    row = None
+                if row is not None and not self.read_only:
+                    with conn:
+                        conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            except sqlite3.Error as e:
+                log.warning("Response cache read failed: %s", e)
+                row = None
+
+        with self.lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if row is None else row[0]
+
+    def put(self, model_name, prompt, response):
+        if self.read_only:
+            return
+        conn = self._connect()
+        now = time.time()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (self.make_key(model_name, prompt), model_name, response, now, now),
+                )
+        except sqlite3.Error as e:
+            log.warning("Response cache write failed: %s", e)
+            return
+
+        with self.lock:
+            self.puts += 1
+            should_evict = self.puts % self.evict_every == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        if self.read_only:
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            log.warning("Response cache eviction failed: %s", e)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "puts": self.puts}
@@ -0,0 +1,98 @@
+import pygame
+
+
+class Widget:
+    def __init__(self, name, state, rect, draw):
+        self.name = name
+        self.state = state
+        self.rect = pygame.Rect(rect)
+        self.draw = draw
+
+
+class DialogueScene:
+    """Retained dialogue scene with a cached static layer and dirty-rect updates.
+
+    The background and character are rendered once into a static layer and
+    only rebuilt when their key changes. Every frame the caller re-declares
+    its widgets with a state value; widgets whose state or rect changed since
+    the last frame (or that appeared or disappeared) mark their area dirty.
+    render() restores the static layer under those areas, redraws whatever
+    widgets overlap them, and returns the rects to pass to display.update.
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.static_layer = None
+        self.static_key = None
+        self.widgets = []
+        self.previous = {}
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Force a full redraw, e.g. after something else drew over the screen."""
+        self.full_redraw = True
+
+    def set_static(self, key, draw):
+        if key == self.static_key and self.static_layer is not None:
+            return
+        self.static_key = key
+        self.static_layer = pygame.Surface(self.screen.get_size()).convert()
+        draw(self.static_layer)
+        self.full_redraw = True
+
+    def add(self, name, state, rect, draw):
+        self.widgets.append(Widget(name, state, rect, draw))
+
+    def _damage(self):
+        current = {widget.name: widget for widget in self.widgets}
+        damage = []
+        for name in self.previous.keys() | current.keys():
+            old = self.previous.get(name)
+            new = current.get(name)
+            if old is None:
+                damage.append(new.rect)
+            elif new is None:
+                damage.append(old.rect)
+            elif old.state != new.state or old.rect != new.rect:
+                damage.append(old.rect)
+                damage.append(new.rect)
+        return merge_rects(damage)
+
+    def render(self):
+        screen_rect = self.screen.get_rect()
+        if self.full_redraw:
+            self.screen.blit(self.static_layer, (0, 0))
+            for widget in self.widgets:
+                widget.draw(self.screen)
+            dirty = [screen_rect]
+            self.full_redraw = False
+        else:
+            dirty = [rect.clip(screen_rect) for rect in self._damage()]
+            dirty = [rect for rect in dirty if rect.width and rect.height]
+            for rect in dirty:
+                self.screen.set_clip(rect)
+                self.screen.blit(self.static_layer, rect, rect)
+                for widget in self.widgets:
+                    if widget.rect.colliderect(rect):
+                        widget.draw(self.screen)
+            self.screen.set_clip(None)
+
+        self.previous = {widget.name: widget for widget in self.widgets}
+        self.widgets = []
+        return dirty
+
+
+def merge_rects(rects):
+    """Union overlapping rects so no area is redrawn twice in one frame."""
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
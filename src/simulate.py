@@ -0,0 +1,209 @@
+"""Headless session simulator and latency benchmark.
+
+Plays the real game_loop, waiting_for_space, choose_next_location and
+encounter transitions under SDL's dummy video driver. Scripted or random
+clicks are injected through the loop driver's event hook, and the LLM
+backend is the deterministic MockBackend with configurable latency.
+
+    SDL_VIDEODRIVER=dummy python simulate.py --encounters 1000 --latency-ms 80
+
+Reports frame-time percentiles per loop, per-turn latency (click to reply
+shown) and peak RSS.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import loop
+from dialogue import option_rects
+from llm_backends import MockBackend
+
+
+def option_click_positions(width, height, count=4):
+    """Points that land on each dialogue option slot, bottom slot first.
+
+    Uses the game's own option layout. Later slots are checked first by
+    DialogueSystem.handle_click, so each point sits in the part of its
+    slot that the slots above it don't cover.
+    """
+    rects = option_rects(height, count)
+    positions = []
+    for i, rect in enumerate(rects):
+        top = max([above.bottom for above in rects[i + 1:] if above.colliderect(rect)] + [rect.top])
+        positions.append((rect.centerx, (top + rect.bottom) // 2))
+    return positions
+
+
+def percentiles(values, points=(50, 95, 99)):
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for p in points:
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        result[f"p{p}"] = ordered[index] * 1000
+    result["max"] = ordered[-1] * 1000
+    result["count"] = len(ordered)
+    return result
+
+
+class ScriptedPlayer:
+    """Event hook that plays the game: clicks options, presses SPACE, picks locations."""
+
+    def __init__(self, game, encounters, clicks, rng, fps, idle):
+        self.game = game
+        self.target_encounters = encounters
+        self.clicks = clicks
+        self.rng = rng
+        self.fps = fps
+        self.idle = idle
+        self.encounters = 0
+        self.turns = 0
+        self.done = False
+        self.click_time = None
+        self.last_frame = None
+        self.frame_times = {}
+        self.turn_latencies = []
+        self.configured = set()
+
+    def next_click(self):
+        positions = option_click_positions(self.game.SCREEN_WIDTH, self.game.SCREEN_HEIGHT)
+        if self.clicks == "random":
+            return positions[self.rng.randrange(len(positions))]
+        return positions[self.clicks[self.turns % len(self.clicks)]]
+
+    def __call__(self, driver):
+        now = time.perf_counter()
+        if driver.name not in self.configured:
+            driver.fps = self.fps
+            driver.idle = self.idle
+            self.configured.add(driver.name)
+        if self.last_frame is not None and self.last_frame[0] == driver.name:
+            self.frame_times.setdefault(driver.name, []).append(now - self.last_frame[1])
+        self.last_frame = (driver.name, now)
+
+        busy = self.game.npc_worker.busy
+        if self.click_time is not None and not busy:
+            self.turn_latencies.append(now - self.click_time)
+            self.click_time = None
+            self.turns += 1
+
+        if driver.name == "game_loop":
+            if self.done:
+                return [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE, mod=0, unicode="", scancode=0)]
+            if not busy and self.click_time is None:
+                self.click_time = now
+                return [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=self.next_click(), button=1)]
+        elif driver.name == "waiting_for_space":
+            key = pygame.K_ESCAPE if self.done else pygame.K_SPACE
+            return [pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0)]
+        elif driver.name == "choose_next_location":
+            self.encounters += 1
+            if self.encounters >= self.target_encounters:
+                self.done = True
+            i = self.rng.randrange(4)
+            pos = (self.game.SCREEN_WIDTH // 2, self.game.SCREEN_HEIGHT // 2 + i * 70 + 25)
+            return [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)]
+        return []
+
+
+def run(args):
+    random.seed(args.seed)
+    quiet = contextlib.redirect_stdout(io.StringIO()) if args.quiet else contextlib.nullcontext()
+    with quiet:
+        import main as game
+        from response_cache import ResponseCache
+
+        mock = MockBackend(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           error_rate=args.error_rate, seed=args.seed)
+        game.backend = game.make_resilient(mock)
+        game.stream_responses = args.stream
+        game.speculative_prefetch = args.prefetch
+        game.prepare_opening_line = args.opening_line
+        game.FADE_DURATION_MS = args.fade_ms
+        cache_dir = tempfile.mkdtemp(prefix="vn-sim-")
+        game.response_cache = ResponseCache(os.path.join(cache_dir, "responses.sqlite3"),
+                                            read_only=not args.response_cache)
+        game.setup_display(args.width, args.height)
+
+        clicks = "random" if args.clicks == "random" else [int(c) for c in args.clicks.split(",")]
+        player = ScriptedPlayer(game, args.encounters, clicks, random.Random(args.seed), args.fps, args.idle)
+        loop.event_hook = player
+        started = time.perf_counter()
+        try:
+            game.game_loop()
+        finally:
+            loop.event_hook = None
+        elapsed = time.perf_counter() - started
+
+    return {
+        "encounters": player.encounters,
+        "turns": player.turns,
+        "llm_calls": mock.calls,
+        "wall_seconds": elapsed,
+        "turn_latency_ms": percentiles(player.turn_latencies),
+        "frame_time_ms": {name: percentiles(times) for name, times in player.frame_times.items()},
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def print_report(report):
+    print(f"{report['encounters']} encounters, {report['turns']} turns, "
+          f"{report['llm_calls']} LLM calls in {report['wall_seconds']:.1f}s")
+    latency = report["turn_latency_ms"]
+    if latency:
+        print(f"turn latency: p50 {latency['p50']:.1f}ms  p95 {latency['p95']:.1f}ms  "
+              f"p99 {latency['p99']:.1f}ms  max {latency['max']:.1f}ms")
+    for name, frames in report["frame_time_ms"].items():
+        print(f"{name} frame time ({frames['count']} frames): p50 {frames['p50']:.2f}ms  "
+              f"p95 {frames['p95']:.2f}ms  p99 {frames['p99']:.2f}ms  max {frames['max']:.2f}ms")
+    print(f"peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless session simulator and latency benchmark")
+    parser.add_argument("--encounters", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--clicks", default="random",
+                        help="'random', or a comma separated list of option slots (0 = bottom) to cycle through")
+    parser.add_argument("--fps", type=int, default=0, help="frame cap, 0 for uncapped")
+    parser.add_argument("--idle", action="store_true", help="let loops block on events like the real game")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fade-ms", type=int, default=0)
+    parser.add_argument("--no-stream", dest="stream", action="store_false")
+    parser.add_argument("--prefetch", action="store_true")
+    parser.add_argument("--opening-line", action="store_true", help="request each NPC's opening line ahead of time")
+    parser.add_argument("--response-cache", action="store_true", help="cache replies in a temporary database")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--metrics-out", help="export the game's metrics here (.prom or JSON lines)")
+    parser.add_argument("--verbose", dest="quiet", action="store_false", help="show the game's own output")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.metrics_out:
+        from metrics import metrics
+        metrics.export(args.metrics_out)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
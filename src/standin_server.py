@@ -0,0 +1,111 @@
+"""Local stand-in for the LLM API, for offline play, load tests and CI.
+
+    python standin_server.py --port 8765 --latency-ms 300 --jitter-ms 150 --error-rate 0.05
+
+Then start the game with --backend http. Replies are deterministic per
+prompt; latency, jitter, errors and streaming speed are simulated. See
+HttpBackend in llm_backends.py for the protocol.
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_backends import estimate_tokens, mock_reply
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.0: the body runs until the connection closes, which lets us
+    # stream lines without chunked encoding
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+            prompt = request["prompt"]
+        except (ValueError, KeyError):
+            self._send_json(400, {"error": "expected JSON with a prompt"})
+            return
+
+        server = self.server
+        text, _ = mock_reply(f"{request.get('model', '')}:{prompt}", server.seed)
+        delay = max(0.0, server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms)) / 1000.0
+        tokens = estimate_tokens(prompt) + estimate_tokens(text)
+
+        if random.random() < server.error_rate:
+            time.sleep(delay)
+            self._send_json(503, {"error": "simulated overload"})
+            return
+
+        if not request.get("stream"):
+            time.sleep(delay)
+            self._send_json(200, {"text": text, "tokens": tokens})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        time.sleep(delay)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(server.chunk_delay_ms / 1000.0)
+            chunk = word if i == 0 else " " + word
+            self.wfile.write((json.dumps({"text": chunk}) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write((json.dumps({"done": True, "tokens": tokens}) + "\n").encode("utf-8"))
+
+
+def make_server(host="127.0.0.1", port=8765, latency_ms=300, jitter_ms=100, error_rate=0.0,
+                chunk_delay_ms=40, seed=0, quiet=True):
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    server.latency_ms = latency_ms
+    server.jitter_ms = jitter_ms
+    server.error_rate = error_rate
+    server.chunk_delay_ms = chunk_delay_ms
+    server.seed = seed
+    server.quiet = quiet
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300, help="time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--chunk-delay-ms", type=float, default=40, help="delay between streamed chunks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", dest="quiet", action="store_false")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+                         args.chunk_delay_ms, args.seed, args.quiet)
+    print(f"Stand-in LLM server on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
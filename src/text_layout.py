@@ -0,0 +1,151 @@
+from collections import OrderedDict
+
+
+class IncrementalWrapper:
+    """Greedy word wrapper for text that only ever grows at the end.
+
+    Lines that are already full are kept between calls, so appending a
+    streamed chunk only re-wraps the last line instead of the whole text.
+    """
+
+    def __init__(self, font, max_width):
+        self.font = font
+        self.max_width = max_width
+        self.reset()
+
+    def reset(self):
+        self.text = ""
+        self.consumed = 0  # index just past the last complete word
+        self.lines = []
+        self.line = ""
+
+    def _add_word(self, lines, line, word):
+        test_line = line + word + " "
+        if self.font.size(test_line)[0] > self.max_width:
+            lines.append(line)
+            return word + " "
+        return test_line
+
+    def update(self, text):
+        """Return the wrapped lines for text, reusing work from the previous call."""
+        if not text.startswith(self.text):
+            self.reset()
+        self.text = text
+
+        # Commit every word that is followed by a space; it can't change any more
+        last_space = text.rfind(" ")
+        if last_space >= self.consumed:
+            for word in text[self.consumed:last_space].split(" "):
+                self.line = self._add_word(self.lines, self.line, word)
+            self.consumed = last_space + 1
+
+        # The trailing word may still be growing, lay it out provisionally
+        lines = list(self.lines)
+        line = self._add_word(lines, self.line, text[self.consumed:])
+        lines.append(line)
+        return lines
+
+
+def wrap_lines(font, text, max_width):
+    """Greedy word wrap, same breaks as IncrementalWrapper."""
+    lines = []
+    line = ""
+    for word in text.split(" "):
+        test_line = line + word + " "
+        if font.size(test_line)[0] > max_width:
+            lines.append(line)
+            line = word + " "
+        else:
+            line = test_line
+    lines.append(line)
+    return lines
+
+
+def max_lines_for(font, max_height, padding):
+    # Lines are centred padding + i * linesize below the top of the box
+    return max(1, (max_height - padding) // font.get_linesize())
+
+
+def ellipsize(font, line, max_width):
+    line = line.rstrip()
+    while line and font.size(line + "...")[0] > max_width:
+        line = line[:-1]
+    return line.rstrip() + "..."
+
+
+class TextLayout:
+    def __init__(self, lines, font, size, truncated=False):
+        self.lines = lines
+        self.font = font
+        self.size = size
+        self.line_height = font.get_linesize()
+        self.truncated = truncated
+
+
+class TextLayoutCache:
+    """Memoizes word wrapping and rendered lines for text boxes.
+
+    layout() maps (text, font size, width, height) to line breaks. Text
+    that doesn't fit the height is set in smaller sizes from the font pool,
+    down to min_size, and cut off with "..." after that. Entries are keyed
+    on the text itself, so a box only re-wraps when its text changes.
+    line_surface() keeps the rendered surface of every recently drawn line.
+    """
+
+    def __init__(self, font_pool, max_entries=128, max_lines=512):
+        self.font_pool = font_pool
+        self.max_entries = max_entries
+        self.max_lines = max_lines
+        self.layouts = OrderedDict()
+        self.lines = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def layout(self, text, font_size, max_width, max_height=None, padding=0, min_size=20):
+        key = (text, font_size, max_width, max_height, padding, min_size)
+        layout = self.layouts.get(key)
+        if layout is not None:
+            self.hits += 1
+            self.layouts.move_to_end(key)
+            return layout
+
+        self.misses += 1
+        size = font_size
+        font = self.font_pool.get(size)
+        lines = wrap_lines(font, text, max_width)
+        truncated = False
+        if max_height is not None:
+            while len(lines) > max_lines_for(font, max_height, padding) and size > min_size:
+                size -= 2
+                font = self.font_pool.get(size)
+                lines = wrap_lines(font, text, max_width)
+            limit = max_lines_for(font, max_height, padding)
+            if len(lines) > limit:
+                lines = lines[:limit - 1] + [ellipsize(font, lines[limit - 1], max_width)]
+                truncated = True
+
+        layout = TextLayout(lines, font, size, truncated)
+        self.layouts[key] = layout
+        if len(self.layouts) > self.max_entries:
+            self.layouts.popitem(last=False)
+        return layout
+
+    def line_surface(self, font, line, color):
+        key = (font, line, color)
+        surface = self.lines.get(key)
+        if surface is not None:
+            self.lines.move_to_end(key)
+            return surface
+        surface = font.render(line, True, color)
+        self.lines[key] = surface
+        if len(self.lines) > self.max_lines:
+            self.lines.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.layouts.clear()
+        self.lines.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "layouts": len(self.layouts), "lines": len(self.lines)}
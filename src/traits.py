@@ -0,0 +1,112 @@
+"""Trait reactions compiled to bitmasks.
+
+Every DialogueCharacteristic gets one bit, so an option's characteristics
+and each trait's positive/negative sets become plain integers. A trait
+likes an option if the two masks share a bit, which makes scoring a
+click a handful of ANDs.
+
+score_batch() scores a whole option pool against a whole roster at once.
+It uses NumPy matrix products when NumPy is installed and falls back to
+the integer masks otherwise; both give the same numbers.
+"""
+from dialogue import DialogueCharacteristic
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHARACTERISTIC_BITS = {c: 1 << i for i, c in enumerate(DialogueCharacteristic)}
+
+
+def characteristics_mask(characteristics):
+    mask = 0
+    for characteristic in characteristics:
+        mask |= CHARACTERISTIC_BITS[characteristic]
+    return mask
+
+
+def option_mask(option):
+    # Options are immutable once built, so the mask is computed once per option
+    mask = getattr(option, "mask", None)
+    if mask is None:
+        mask = characteristics_mask(option.characteristics)
+        option.mask = mask
+    return mask
+
+
+def character_traits(character):
+    """Trait list of a Character, a PREDEFINED_CHARACTERS entry or a plain list."""
+    if isinstance(character, dict):
+        return character["traits"]
+    return getattr(character, "personality_traits", character)
+
+
+class TraitEngine:
+    def __init__(self, trait_reactions):
+        self.trait_names = list(trait_reactions)
+        self.index = {trait: i for i, trait in enumerate(self.trait_names)}
+        self.positive = []
+        self.negative = []
+        for trait in self.trait_names:
+            reactions = trait_reactions[trait]
+            self.positive.append(characteristics_mask(reactions.get("positive", ())))
+            self.negative.append(characteristics_mask(reactions.get("negative", ())))
+        self.matrices = None
+
+    def compile_traits(self, traits):
+        """(positive, negative) mask pairs for a character's known traits."""
+        return tuple((self.positive[self.index[t]], self.negative[self.index[t]])
+                     for t in traits if t in self.index)
+
+    def score(self, compiled, mask):
+        reaction = 0
+        for positive, negative in compiled:
+            if mask & positive:
+                reaction += 1
+            if mask & negative:
+                reaction -= 1
+        return reaction
+
+    def score_option(self, traits, option):
+        return self.score(self.compile_traits(traits), option_mask(option))
+
+    def score_batch(self, options, characters):
+        """Reaction of every character to every option, as rows of options.
+
+        Returns a NumPy int array of shape (len(options), len(characters))
+        when NumPy is available, otherwise a list of lists.
+        """
+        if np is not None:
+            return self._score_batch_numpy(options, characters)
+        compiled = [self.compile_traits(character_traits(c)) for c in characters]
+        return [[self.score(traits, mask) for traits in compiled]
+                for mask in (option_mask(o) for o in options)]
+
+    def _trait_matrices(self):
+        if self.matrices is None:
+            bits = len(CHARACTERISTIC_BITS)
+            positive = np.zeros((len(self.trait_names), bits), dtype=np.int32)
+            negative = np.zeros_like(positive)
+            for t in range(len(self.trait_names)):
+                for b in range(bits):
+                    positive[t, b] = (self.positive[t] >> b) & 1
+                    negative[t, b] = (self.negative[t] >> b) & 1
+            self.matrices = (positive, negative)
+        return self.matrices
+
+    def _score_batch_numpy(self, options, characters):
+        positive, negative = self._trait_matrices()
+        bits = len(CHARACTERISTIC_BITS)
+        masks = np.array([option_mask(o) for o in options], dtype=np.int64).reshape(-1, 1)
+        option_bits = ((masks >> np.arange(bits, dtype=np.int64)) & 1).astype(np.int32)
+        # Does option o hit trait t at all: (options x traits)
+        hits = (option_bits @ positive.T > 0).astype(np.int32) - (option_bits @ negative.T > 0).astype(np.int32)
+        # How many times each character has each trait: (characters x traits)
+        counts = np.zeros((len(characters), len(self.trait_names)), dtype=np.int32)
+        for c, character in enumerate(characters):
+            for trait in character_traits(character):
+                t = self.index.get(trait)
+                if t is not None:
+                    counts[c, t] += 1
+        return hits @ counts.T
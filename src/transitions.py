@@ -0,0 +1,115 @@
+"""Encounter transitions that never block the event loop.
+
+Fade works out its alpha from the time since it started, so the loop
+that draws it keeps handling events and looks the same at any frame rate.
+
+EncounterPreparer picks the next character as soon as an encounter's last
+exchange lands and loads it in the background: sprites and background
+are decoded and scaled (via ScaledSurfaceCache.prewarm), and optionally
+the NPC's opening line is requested. By the time the player has pressed
+SPACE and picked a location, take() only has to wrap what is ready.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from characters import PREDEFINED_CHARACTERS, EXPRESSIONS, Character, Background
+from log import log
+
+
+class Fade:
+    def __init__(self, duration_ms, fade_in=False, color=(0, 0, 0)):
+        self.duration_ms = max(1, duration_ms)
+        self.fade_in = fade_in
+        self.color = color
+        self.started = pygame.time.get_ticks()
+        self.overlay = None
+
+    def progress(self):
+        return min(1.0, (pygame.time.get_ticks() - self.started) / self.duration_ms)
+
+    def done(self):
+        return self.progress() >= 1.0
+
+    def draw(self, surface):
+        progress = self.progress()
+        alpha = round(255 * ((1.0 - progress) if self.fade_in else progress))
+        if self.overlay is None or self.overlay.get_size() != surface.get_size():
+            self.overlay = pygame.Surface(surface.get_size())
+            self.overlay.fill(self.color)
+        self.overlay.set_alpha(alpha)
+        surface.blit(self.overlay, (0, 0))
+
+
+class PreparedEncounter:
+    def __init__(self, index, char_info, background_name, opening):
+        self.index = index
+        self.char_info = char_info
+        self.background_name = background_name
+        # Future for the NPC's opening line, or None
+        self.opening = opening
+
+    def waiting(self):
+        return self.opening is not None and not self.opening.done()
+
+    def opening_line(self):
+        """The opening line once it has arrived, None if there is none or it failed."""
+        if self.opening is None or not self.opening.done():
+            return None
+        try:
+            return self.opening.result()
+        except Exception as e:
+            log.warning("Opening line failed: %s", e)
+            return None
+
+    def cancel(self):
+        if self.opening is not None:
+            self.opening.cancel()
+
+
+class EncounterPreparer:
+    """Picks and loads the next encounter while the current one is wrapping up.
+
+    prewarm(entries) starts scaling [((kind, name), expression)] scaled
+    cache entries in the background. opening(char_info, background_name),
+    if given, returns the NPC's first line and runs on a worker thread.
+    """
+
+    def __init__(self, prewarm, opening=None):
+        self.prewarm = prewarm
+        self.opening = opening
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encounter-prep")
+        self.pending = None
+
+    def prepare(self, exclude_index=None, with_opening=False):
+        if self.pending is not None:
+            self.pending.cancel()
+        indices = list(range(len(PREDEFINED_CHARACTERS)))
+        if exclude_index is not None:
+            indices.remove(exclude_index)
+        index = random.choice(indices)
+        char_info = PREDEFINED_CHARACTERS[index]
+        background_name = random.choice(char_info["backgrounds"])
+        self.prewarm([(("background", background_name), None)] +
+                     [(("character", char_info["character_name"]), e) for e in EXPRESSIONS])
+        opening = None
+        if with_opening and self.opening is not None:
+            opening = self.executor.submit(self.opening, char_info, background_name)
+        self.pending = PreparedEncounter(index, char_info, background_name, opening)
+        return self.pending
+
+    def discard(self):
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+
+    def take(self, exclude_index=None, with_opening=False):
+        """Return (character, background, prepared), preparing now if prepare() wasn't called."""
+        prepared = self.pending or self.prepare(exclude_index, with_opening)
+        self.pending = None
+        char_info = prepared.char_info
+        # Images are decoded by now, this only converts them to the display format
+        character = Character(char_info["name"], char_info["character_name"], char_info["char_type"],
+                              char_info["traits"])
+        return character, Background(prepared.background_name), prepared
@@ -0,0 +1,145 @@
+"""Retained-mode widgets for the menus.
+
+Each Button renders its normal and hover looks once. A Menu draws its
+backdrop and labels once into the static layer of a DialogueScene and
+declares its buttons as widgets, so a frame where nothing changed draws
+nothing. Moving onto another button redraws just the two buttons
+involved. The layout is rebuilt only when the window size changes.
+"""
+import pygame
+
+from debug_overlay import debug_overlay
+from loop import loop_driver
+from scene import DialogueScene
+
+WHITE = (255, 255, 255)
+
+
+class ButtonStyle:
+    def __init__(self, color, hover_color, text_color=WHITE, border_color=None, border_width=2, radius=0):
+        self.color = color
+        self.hover_color = hover_color
+        self.text_color = text_color
+        self.border_color = border_color
+        self.border_width = border_width
+        self.radius = radius
+
+
+# Grey with a white rounded border, as in the main and options menus
+ROUNDED = ButtonStyle((50, 50, 50), (100, 100, 100), border_color=WHITE, radius=10)
+# Plain black block, as in the location picker
+FLAT = ButtonStyle((0, 0, 0), (60, 60, 60))
+
+
+class Button:
+    def __init__(self, rect, text, value, style=ROUNDED):
+        self.rect = pygame.Rect(rect)
+        self.text = text
+        self.value = value
+        self.style = style
+        self.surfaces = None
+
+    def render(self, font):
+        self.surfaces = (self._render(font, self.style.color), self._render(font, self.style.hover_color))
+
+    def _render(self, font, color):
+        style = self.style
+        surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        area = surface.get_rect()
+        if style.border_color is not None:
+            pygame.draw.rect(surface, style.border_color, area, border_radius=style.radius)
+            area = area.inflate(-style.border_width * 2, -style.border_width * 2)
+        pygame.draw.rect(surface, color, area, border_radius=max(0, style.radius - style.border_width))
+        text = font.render(self.text, True, style.text_color)
+        surface.blit(text, text.get_rect(center=surface.get_rect().center))
+        return surface
+
+    def draw(self, surface, hovered):
+        surface.blit(self.surfaces[hovered], self.rect)
+
+
+class Label:
+    def __init__(self, text, font, color, center):
+        self.text = text
+        self.font = font
+        self.color = color
+        self.center = center
+
+    def draw(self, surface):
+        text = self.font.render(self.text, True, self.color)
+        surface.blit(text, text.get_rect(center=self.center))
+
+
+class Menu:
+    """A full-screen menu driven by its own loop_driver(name).
+
+    layout(width, height) returns (backdrop, labels, buttons), where
+    backdrop(surface) paints the background. run() shows the menu until
+    on_click(button.value) returns something other than None.
+    """
+
+    def __init__(self, name, layout, font):
+        self.name = name
+        self.layout = layout
+        self.font = font
+        self.scene = None
+        self.size = None
+        self.backdrop = None
+        self.labels = []
+        self.buttons = []
+
+    def build(self, surface):
+        self.size = surface.get_size()
+        self.backdrop, self.labels, self.buttons = self.layout(*self.size)
+        for button in self.buttons:
+            button.render(self.font)
+        self.scene = DialogueScene(surface)
+
+    def draw_static(self, surface):
+        self.backdrop(surface)
+        for label in self.labels:
+            label.draw(surface)
+
+    def button_at(self, pos):
+        for button in self.buttons:
+            if button.rect.collidepoint(pos):
+                return button
+        return None
+
+    def render(self):
+        surface = pygame.display.get_surface()
+        if self.scene is None or self.scene.screen is not surface or surface.get_size() != self.size:
+            self.build(surface)
+        scene = self.scene
+        scene.set_static(self.size, self.draw_static)
+        hovered = self.button_at(pygame.mouse.get_pos())
+        for i, button in enumerate(self.buttons):
+            is_hovered = button is hovered
+            scene.add(f"button_{i}", is_hovered, button.rect,
+                      lambda s, button=button, is_hovered=is_hovered: button.draw(s, is_hovered))
+        overlay_state = debug_overlay.state()
+        if overlay_state is not None:
+            scene.add("debug_overlay", overlay_state, debug_overlay.rect(), debug_overlay.draw)
+        dirty_rects = scene.render()
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+
+    def run(self, on_click, on_quit):
+        if self.scene is not None:
+            # Other screens drew over the display since this menu was last shown
+            self.scene.invalidate()
+        while True:
+            self.render()
+            for event in loop_driver(self.name).events():
+                if event.type == pygame.QUIT:
+                    on_quit()
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    button = self.button_at(event.pos)
+                    if button is None:
+                        continue
+                    result = on_click(button.value)
+                    if result is not None:
+                        return result
+                    # Whatever the click opened drew over the menu, and may have resized it
+                    self.scene.invalidate()
+                    break
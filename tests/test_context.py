@@ -0,0 +1,48 @@
+import threading
+
+from context import ConversationContext, summary_executor
+
+
+def drain():
+    summary_executor.submit(lambda: None).result()
+
+
+def test_fold_reaches_the_prompt_after_the_next_append():
+    calls = []
+    context = ConversationContext(summarize=lambda previous, turns: calls.append(turns) or "earlier",
+                                  keep_turns=2)
+    for i in range(3):
+        context.append(f"p{i}", f"n{i}")
+    drain()
+    assert len(calls) == 1
+    context.append("p3", "n3")
+    assert context.history_text().startswith("Summary of earlier conversation: earlier")
+
+
+def test_no_fold_that_no_later_prompt_could_use():
+    calls = []
+    context = ConversationContext(summarize=lambda previous, turns: calls.append(turns) or "earlier",
+                                  keep_turns=2, max_turns=4)
+    for i in range(4):
+        context.append(f"p{i}", f"n{i}")
+    drain()
+    # Folds started on turns 3 and 4 would only be swapped in after the last prompt
+    assert calls == []
+
+
+def test_close_drops_a_pending_summary():
+    started = threading.Event()
+    release = threading.Event()
+    blocker = summary_executor.submit(lambda: started.set() or release.wait(5))
+    started.wait(5)
+    calls = []
+    context = ConversationContext(summarize=lambda previous, turns: calls.append(turns) or "earlier",
+                                  keep_turns=1)
+    context.append("p0", "n0")
+    context.append("p1", "n1")
+    context.close()
+    release.set()
+    blocker.result()
+    drain()
+    assert calls == []
+    assert context.ready is None
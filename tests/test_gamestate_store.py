@@ -0,0 +1,55 @@
+import json
+
+from gamestate_store import GameStateStore
+
+
+def open_store(tmp_path, **options):
+    return GameStateStore(str(tmp_path / "gamestate.json"), str(tmp_path / "journal.jsonl"), **options)
+
+
+def test_encounters_survive_a_reload(tmp_path):
+    store = open_store(tmp_path)
+    store.append_encounter({"location": "Tavern", "npc_class": "Bard"}, notable_events=["Sang along"])
+    store.append_encounter({"location": "Docks", "npc_class": "Sailor"})
+
+    reloaded = open_store(tmp_path)
+    assert reloaded.encounter_count == 2
+    assert [e["encounter_number"] for e in reloaded.history] == [1, 2]
+    assert reloaded.state["current_location"] == "Docks"
+    assert reloaded.notable_events == ["Sang along"]
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    store = open_store(tmp_path, compact_every=2)
+    for location in ("Tavern", "Docks", "Market"):
+        store.append_encounter({"location": location})
+
+    with open(tmp_path / "gamestate.json") as f:
+        assert json.load(f)["encounter_count"] == 2
+    assert len((tmp_path / "journal.jsonl").read_text().splitlines()) == 1
+    assert open_store(tmp_path).encounter_count == 3
+
+
+def test_entries_already_in_the_snapshot_are_skipped(tmp_path):
+    store = open_store(tmp_path)
+    store.append_encounter({"location": "Tavern"})
+    journal = (tmp_path / "journal.jsonl").read_text()
+    store.compact()
+    # A crash between the snapshot write and the journal reset
+    (tmp_path / "journal.jsonl").write_text(journal)
+
+    assert len(open_store(tmp_path).history) == 1
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    store = open_store(tmp_path)
+    store.append_encounter({"location": "Tavern"})
+    with open(tmp_path / "journal.jsonl", "a") as f:
+        f.write('{"encounter": {"locat')
+
+    reloaded = open_store(tmp_path)
+    assert reloaded.encounter_count == 1
+    # Loading leaves the tail for the writer, who may still be finishing it
+    assert (tmp_path / "journal.jsonl").read_text().endswith('{"locat')
+    reloaded.append_encounter({"location": "Docks"})
+    assert open_store(tmp_path).encounter_count == 2
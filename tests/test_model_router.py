@@ -0,0 +1,77 @@
+import time
+
+from model_router import ModelRouter
+
+TIERS = [("fast", "small"), ("full", "big")]
+
+
+def test_ordinary_turn_uses_fast_tier():
+    router = ModelRouter(TIERS)
+    assert router.reply(lambda p, model, deadline: (model, 1), "hello") == ("small", 1)
+
+
+def test_first_turn_and_long_prompt_use_full_tier():
+    router = ModelRouter(TIERS, long_prompt_chars=10)
+    assert router.reply(lambda p, model, deadline: (model, 0), "hi", first_turn=True)[0] == "big"
+    assert router.reply(lambda p, model, deadline: (model, 0), "x" * 11)[0] == "big"
+
+
+def test_failed_check_escalates_within_one_deadline():
+    router = ModelRouter(TIERS, turn_deadline_s=5.0)
+    deadlines = []
+
+    def fetch(prompt, model, deadline):
+        deadlines.append(deadline)
+        return ("Hi *waves*", 2) if model == "small" else ("Hello.", 3)
+
+    assert router.reply(fetch, "hello") == ("Hello.", 5)
+    # Both tiers share the turn's deadline
+    assert len(set(deadlines)) == 1
+
+
+def test_escalation_skipped_when_budget_is_spent():
+    router = ModelRouter(TIERS, turn_deadline_s=0.2, min_escalation_s=0.15)
+    models = []
+
+    def fetch(prompt, model, deadline):
+        models.append(model)
+        time.sleep(0.1)
+        return "Hi *waves*", 1
+
+    started = time.monotonic()
+    assert router.reply(fetch, "hello") == ("Hi *waves*", 1)
+    assert models == ["small"]
+    assert time.monotonic() - started < 0.2
+
+
+def streaming_fetch(replies):
+    def fetch(prompt, model, deadline, on_chunk):
+        for chunk in replies[model]:
+            on_chunk(chunk)
+        return "".join(replies[model]), 1
+    return fetch
+
+
+def test_escalated_reply_is_never_streamed():
+    router = ModelRouter(TIERS)
+    shown = []
+    fetch = streaming_fetch({"small": ["Hi ", "*waves*"], "big": ["Hello", " there."]})
+    assert router.reply(fetch, "hello", on_chunk=shown.append) == ("Hello there.", 2)
+    # Only the full tier's reply reached the bubble, chunk by chunk
+    assert shown == ["Hello", " there."]
+
+
+def test_accepted_fast_reply_is_passed_on():
+    router = ModelRouter(TIERS)
+    shown = []
+    fetch = streaming_fetch({"small": ["Hi", " there."], "big": ["unused"]})
+    assert router.reply(fetch, "hello", on_chunk=shown.append) == ("Hi there.", 1)
+    assert "".join(shown) == "Hi there."
+
+
+def test_reply_kept_when_escalation_is_skipped_is_passed_on():
+    router = ModelRouter(TIERS, turn_deadline_s=0.0)
+    shown = []
+    fetch = streaming_fetch({"small": ["Hi ", "*waves*"], "big": ["unused"]})
+    assert router.reply(fetch, "hello", on_chunk=shown.append) == ("Hi *waves*", 1)
+    assert "".join(shown) == "Hi *waves*"
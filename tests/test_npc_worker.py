@@ -0,0 +1,41 @@
+import threading
+
+import pygame
+
+from npc_worker import NPC_RESPONSE_EVENT, NpcResponseWorker
+
+
+def test_stale_request_does_not_hold_up_the_next_one():
+    pygame.init()
+    release = threading.Event()
+    calls = []
+    worker = NpcResponseWorker()
+    try:
+        # A request from the encounter the player just left
+        worker.submit(lambda: calls.append("old") or release.wait(5) or "old")
+        worker.cancel()
+        finished = threading.Event()
+        worker.submit(lambda: calls.append("new") or finished.set() or "new")
+        assert finished.wait(2)
+    finally:
+        release.set()
+        worker.shutdown()
+        pygame.quit()
+
+
+def test_cancelled_request_that_never_started_is_dropped():
+    pygame.init()
+    release = threading.Event()
+    calls = []
+    worker = NpcResponseWorker(max_workers=1)
+    try:
+        blocker = worker.executor.submit(release.wait, 5)
+        worker.submit(lambda: calls.append("dropped"))
+        worker.cancel()
+        release.set()
+        blocker.result()
+        worker.executor.shutdown(wait=True)
+        assert calls == []
+        assert not [e for e in pygame.event.get() if e.type == NPC_RESPONSE_EVENT]
+    finally:
+        pygame.quit()
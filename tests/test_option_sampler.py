@@ -0,0 +1,47 @@
+import random
+
+from characters import trait_engine
+from dialogue import dialogue_options
+from option_sampler import OptionSampler
+from traits import option_mask
+
+
+class Npc:
+    """Just what the sampler needs from a Character."""
+
+    def __init__(self, traits):
+        self.trait_masks = trait_engine.compile_traits(traits)
+
+    def react_to_dialogue(self, option):
+        return trait_engine.score(self.trait_masks, option_mask(option))
+
+
+def test_sample_is_distinct_and_leaves_the_pool_alone():
+    pool = list(dialogue_options)
+    sampler = OptionSampler(pool, rng=random.Random(1))
+    for _ in range(50):
+        options = sampler.sample(4)
+        assert len({id(o) for o in options}) == 4
+    assert pool == dialogue_options
+
+
+def test_recent_options_are_avoided():
+    sampler = OptionSampler(dialogue_options[:8], recent=4, rng=random.Random(2))
+    for _ in range(20):
+        first = sampler.sample(4)
+        second = sampler.sample(4)
+        assert not {id(o) for o in first} & {id(o) for o in second}
+
+
+def test_small_pool_still_fills_the_draw():
+    sampler = OptionSampler(dialogue_options[:5], recent=16, rng=random.Random(3))
+    for _ in range(10):
+        assert len({id(o) for o in sampler.sample(4)}) == 4
+
+
+def test_mix_includes_a_liked_and_a_disliked_option():
+    npc = Npc(["shy", "friendly"])
+    sampler = OptionSampler(dialogue_options, rng=random.Random(4))
+    for _ in range(50):
+        reactions = [npc.react_to_dialogue(o) for o in sampler.sample(4, npc, mix=True)]
+        assert max(reactions) > 0 and min(reactions) < 0
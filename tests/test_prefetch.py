@@ -0,0 +1,41 @@
+import threading
+
+from prefetch import SpeculativePrefetcher
+
+
+def test_queued_pick_is_cancelled_and_left_to_the_caller():
+    release = threading.Event()
+    started = []
+
+    def fetch(prompt):
+        started.append(prompt)
+        release.wait(5)
+        return prompt.upper(), 1
+
+    prefetcher = SpeculativePrefetcher(fetch, max_concurrent=1)
+    prefetcher.prefetch(["a", "b"])
+    # "a" holds the only slot, "b" hasn't started
+    assert prefetcher.take("b") is None
+    release.set()
+    prefetcher.executor.shutdown(wait=True)
+    assert started == ["a"]
+    assert prefetcher.stats()["queued"] == 1
+    assert prefetcher.stats()["wasted_requests"] == 1
+
+
+def test_started_pick_is_returned():
+    running = threading.Event()
+    release = threading.Event()
+
+    def fetch(prompt):
+        running.set()
+        release.wait(5)
+        return prompt.upper(), 1
+
+    prefetcher = SpeculativePrefetcher(fetch, max_concurrent=1)
+    prefetcher.prefetch(["a"])
+    running.wait(5)
+    future = prefetcher.take("a")
+    release.set()
+    assert future.result() == ("A", 1)
+    assert prefetcher.stats()["hits"] == 1
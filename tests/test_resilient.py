@@ -0,0 +1,138 @@
+import time
+
+import pytest
+
+from llm_backends import BackendError, MockBackend
+from resilient import CircuitBreaker, CircuitOpen, DeadlineExceeded, ResilientBackend
+
+
+class FlakyBackend(MockBackend):
+    def __init__(self):
+        super().__init__(latency_ms=0, jitter_ms=0)
+        self.down = True
+        self.attempts = 0
+
+    def generate(self, prompt, model=None):
+        self.attempts += 1
+        if self.down:
+            raise BackendError("down")
+        return "ok", 1
+
+
+def resilient(backend, **options):
+    options.setdefault("base_delay_s", 0.001)
+    return ResilientBackend(backend, **options)
+
+
+def test_retries_until_success():
+    backend = FlakyBackend()
+    calls = []
+
+    def generate(prompt, model=None):
+        calls.append(prompt)
+        if len(calls) < 3:
+            raise BackendError("blip")
+        return "ok", 1
+
+    backend.generate = generate
+    assert resilient(backend, max_retries=2).generate("hi") == ("ok", 1)
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_retries():
+    backend = FlakyBackend()
+    with pytest.raises(BackendError):
+        resilient(backend, max_retries=2, breaker=CircuitBreaker(100)).generate("hi")
+    assert backend.attempts == 3
+
+
+def test_breaker_opens_and_fails_fast():
+    backend = FlakyBackend()
+    client = resilient(backend, max_retries=0, breaker=CircuitBreaker(2, cooldown_s=60))
+    for _ in range(2):
+        with pytest.raises(BackendError):
+            client.generate("hi")
+    with pytest.raises(CircuitOpen):
+        client.generate("hi")
+    assert backend.attempts == 2
+
+
+def test_breaker_closes_again_after_failed_trial():
+    backend = FlakyBackend()
+    breaker = CircuitBreaker(1, cooldown_s=0.05)
+    client = resilient(backend, max_retries=2, breaker=breaker)
+    with pytest.raises(BackendError):
+        client.generate("hi")
+    assert breaker.state == "open"
+
+    # The half-open trial fails: no retries, and the circuit opens again
+    time.sleep(0.06)
+    attempts = backend.attempts
+    with pytest.raises(BackendError):
+        client.generate("hi")
+    assert backend.attempts == attempts + 1
+    assert breaker.state == "open"
+    assert not breaker.trial_running
+
+    # Once the backend is back, the next trial closes the circuit
+    backend.down = False
+    time.sleep(0.06)
+    assert client.generate("hi") == ("ok", 1)
+    assert breaker.state == "closed"
+    assert client.generate("hi") == ("ok", 1)
+
+
+def test_deadline():
+    class Slow(MockBackend):
+        def generate(self, prompt, model=None):
+            time.sleep(1.0)
+            return "late", 1
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        resilient(Slow(), deadline_s=0.1).generate("hi")
+    assert time.monotonic() - started < 0.5
+
+
+def test_stream_is_not_retried_after_first_chunk():
+    class Broken(MockBackend):
+        attempts = 0
+
+        def stream(self, prompt, on_chunk, model=None):
+            Broken.attempts += 1
+            on_chunk("Hel")
+            raise BackendError("connection reset")
+
+    chunks = []
+    with pytest.raises(BackendError):
+        resilient(Broken(), max_retries=3, breaker=CircuitBreaker(100)).stream("hi", chunks.append)
+    assert Broken.attempts == 1
+    assert chunks == ["Hel"]
+
+
+def test_shutdown_wakes_waiting_call():
+    import threading
+
+    class Slow(MockBackend):
+        def generate(self, prompt, model=None):
+            time.sleep(5.0)
+            return "late", 1
+
+    client = resilient(Slow(), deadline_s=10)
+    threading.Timer(0.1, client.shutdown).start()
+    started = time.monotonic()
+    with pytest.raises(BackendError):
+        client.generate("hi")
+    assert time.monotonic() - started < 1.0
+
+
+def test_caller_deadline_wins_when_sooner():
+    class Slow(MockBackend):
+        def generate(self, prompt, model=None):
+            time.sleep(1.0)
+            return "late", 1
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        resilient(Slow(), deadline_s=10).generate("hi", deadline=time.monotonic() + 0.1)
+    assert time.monotonic() - started < 0.5
@@ -0,0 +1,53 @@
+import time
+
+from response_cache import ResponseCache
+
+
+def test_put_then_get(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    assert cache.get("small", "Hello") is None
+    cache.put("small", "Hello", "Hi there.")
+    assert cache.get("small", "Hello") == "Hi there."
+    # The model is part of the key
+    assert cache.get("large", "Hello") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "puts": 1}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=2, evict_every=1000)
+    cache.put("m", "a", "A")
+    time.sleep(0.01)
+    cache.put("m", "b", "B")
+    time.sleep(0.01)
+    cache.get("m", "a")
+    time.sleep(0.01)
+    cache.put("m", "c", "C")
+    cache.evict()
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == "A"
+    assert cache.get("m", "c") == "C"
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_age=0.05)
+    cache.put("m", "a", "A")
+    time.sleep(0.1)
+    assert cache.get("m", "a") is None
+
+
+def test_read_only_cache_reads_but_never_writes(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    ResponseCache(path).put("m", "a", "A")
+
+    cache = ResponseCache(path, read_only=True)
+    assert cache.get("m", "a") == "A"
+    cache.put("m", "b", "B")
+    assert ResponseCache(path).get("m", "b") is None
+
+
+def test_read_only_cache_without_a_file(tmp_path):
+    path = tmp_path / "missing.sqlite3"
+    cache = ResponseCache(str(path), read_only=True)
+    assert cache.get("m", "a") is None
+    assert not path.exists()
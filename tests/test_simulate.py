@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+
+from dialogue import DialogueSystem, dialogue_options
+from simulate import option_click_positions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_simulator_smoke_run(tmp_path):
+    report = tmp_path / "report.json"
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    subprocess.run([sys.executable, "simulate.py", "--encounters", "2", "--width", "800", "--height", "600",
+                    "--json", str(report)],
+                   cwd=os.path.join(ROOT, "src"), env=env, check=True, timeout=300, capture_output=True)
+
+    with open(report) as f:
+        result = json.load(f)
+    assert result["encounters"] == 2
+    assert result["turns"] > 0
+
+
+def test_click_positions_hit_every_option():
+    for width, height in ((800, 600), (1920, 1080)):
+        dialogue = DialogueSystem(width, height)
+        dialogue.selected_dialogue_options = dialogue_options[:4]
+        dialogue.layout_dialogue_options()
+        picked = [dialogue.handle_click(pos) for pos in option_click_positions(width, height)]
+        assert picked == dialogue_options[:4]
@@ -0,0 +1,32 @@
+from characters import TRAIT_REACTIONS, trait_engine
+from dialogue import dialogue_options
+
+CHARACTERS = [[], ["shy"], ["warrior", "serious"], ["romantic", "sarcastic", "friendly"],
+              ["intellectual", "intellectual"], ["unknown trait", "friendly"]]
+
+
+def naive_score(traits, option):
+    """The reaction rule spelled out over the TRAIT_REACTIONS sets."""
+    reaction = 0
+    for trait in traits:
+        reactions = TRAIT_REACTIONS.get(trait)
+        if reactions is None:
+            continue
+        if any(c in reactions["positive"] for c in option.characteristics):
+            reaction += 1
+        if any(c in reactions["negative"] for c in option.characteristics):
+            reaction -= 1
+    return reaction
+
+
+def test_masks_score_like_the_reaction_sets():
+    for traits in CHARACTERS:
+        for option in dialogue_options:
+            assert trait_engine.score_option(traits, option) == naive_score(traits, option), (traits, option)
+
+
+def test_batch_scores_match_single_scores():
+    scores = trait_engine.score_batch(dialogue_options, CHARACTERS)
+    for o, option in enumerate(dialogue_options):
+        for c, traits in enumerate(CHARACTERS):
+            assert scores[o][c] == naive_score(traits, option)